@@ -1,14 +1,57 @@
 #!/usr/bin/env python
 import argparse
+import csv
+import math
 import os
 import subprocess
+import tempfile
 import warnings
 import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+
+def get_cgroup_cpu_limit() -> Optional[int]:
+    """Get the CPU limit set by a cgroup CFS quota (e.g. docker --cpus or a
+    Kubernetes CPU limit), or None if there is no quota."""
+    try:
+        # cgroup v2: "<quota> <period>", quota is "max" when unlimited
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+    except (OSError, ValueError):
+        try:
+            # cgroup v1: quota is -1 when unlimited
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = f.read().strip()
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = f.read().strip()
+        except OSError:
+            return None
+    try:
+        quota, period = int(quota), int(period)
+    except ValueError:
+        return None
+    if quota <= 0 or period <= 0:
+        return None
+    return max(1, math.ceil(quota / period))
+
+
+def get_available_cpus() -> int:
+    """Get number of CPUs usable by this process (respects cpusets and cgroup
+    CPU quotas)."""
+    try:
+        n_cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        n_cpus = multiprocessing.cpu_count()
+    cgroup_limit = get_cgroup_cpu_limit()
+    if cgroup_limit is not None:
+        n_cpus = min(n_cpus, cgroup_limit)
+    return n_cpus
 
 
 def get_default_processes():
     """Get default number of processes (n_threads - 1)."""
-    return max(1, multiprocessing.cpu_count() - 1)
+    return max(1, get_available_cpus() - 1)
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -41,6 +84,11 @@ def parse_arguments() -> argparse.Namespace:
         default=get_default_processes(),
         help=f"Number of processes to use for parallel genome processing (default: {get_default_processes()})",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild models even if they already exist in the output folder (TSV mode)",
+    )
 
     # Rest of arguments remain the same
     input_type_args = parser.add_mutually_exclusive_group()
@@ -97,6 +145,60 @@ def parse_arguments() -> argparse.Namespace:
     return parser.parse_args()
 
 
+def get_model_path(genome: str, outdir: str) -> str:
+    """Get path of the model CarveMe writes for a genome in TSV mode."""
+    name = os.path.basename(genome)
+    if name.endswith(".gz"):
+        name = name[:-3]
+    return os.path.join(outdir, os.path.splitext(name)[0] + ".xml")
+
+
+def read_genome_table(tsv_file: str) -> tuple:
+    """Read TSV input file, returning its header and rows."""
+    with open(tsv_file, "r", newline="") as file:
+        reader = csv.DictReader(file, delimiter="\t")
+        return reader.fieldnames, list(reader)
+
+
+def write_genome_table(fieldnames: list, rows: list, tsv_file: str) -> None:
+    """Write rows back to a TSV input file for CarveMe."""
+    with open(tsv_file, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames, delimiter="\t")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def get_pending_genomes(rows: list, outdir: str) -> list:
+    """Drop rows whose model already exists (and is not empty) in outdir."""
+    pending = []
+    for row in rows:
+        model_path = get_model_path(row["genome"], outdir)
+        if os.path.isfile(model_path) and os.path.getsize(model_path) > 0:
+            continue
+        pending.append(row)
+    return pending
+
+
+def sort_genome_rows(rows: list) -> list:
+    """Sort rows by universe and media file, keeping input order within groups."""
+    return sorted(rows, key=lambda row: (row["universe"], row["media_file"]))
+
+
+def get_missing_files(rows: list, columns=("genome", "universe", "media_file")) -> list:
+    """
+    Get input files referenced in the TSV rows that do not exist. Each distinct
+    path is checked once, and the checks run concurrently since stat calls on
+    network file systems are slow.
+    """
+    # Deduplicate keeping table order, so files are reported as they appear
+    paths = list(
+        dict.fromkeys(row[col] for row in rows for col in columns if row.get(col))
+    )
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        exists = executor.map(os.path.isfile, paths)
+        return [path for path, found in zip(paths, exists) if not found]
+
+
 def build_carve_command(args) -> list:
     """Build the CarveMe command with all specified arguments."""
     # Changed to use positional input argument
@@ -162,13 +264,45 @@ def main() -> None:
         # Create output directory if it doesn't exist
         os.makedirs(args.output, exist_ok=True)
 
+        # Skip genomes whose models were built by a previous run
+        pending_tsv = None
+        if args.tsv:
+            fieldnames, rows = read_genome_table(args.input)
+            pending = rows if args.force else get_pending_genomes(rows, args.output)
+            missing = get_missing_files(pending)
+            if missing:
+                raise FileNotFoundError(f"Missing input files: {', '.join(missing)}")
+            if not pending:
+                print(
+                    "All models already exist, nothing to do (use --force to rebuild)"
+                )
+                return
+            if len(pending) < len(rows):
+                print(
+                    f"Skipping {len(rows) - len(pending)} genomes with existing models"
+                )
+            # Run genomes sharing a universe and medium next to each other, so
+            # CarveMe workers find those (large) files in the page cache
+            ordered = sort_genome_rows(pending)
+            if ordered != rows:
+                with tempfile.NamedTemporaryFile(
+                    "w", suffix=".tsv", dir=args.output, delete=False
+                ) as file:
+                    pending_tsv = file.name
+                write_genome_table(fieldnames, ordered, pending_tsv)
+                args.input = pending_tsv
+
         # Build and run CarveMe command
         carve_command = build_carve_command(args)
 
         print("Running CarveMe with command:")
         print(" ".join(carve_command))
 
-        subprocess.run(carve_command, check=True)
+        try:
+            subprocess.run(carve_command, check=True)
+        finally:
+            if pending_tsv is not None:
+                os.remove(pending_tsv)
         print("CarveMe processing completed successfully")
 
     except subprocess.CalledProcessError as e:
@@ -1,9 +1,17 @@
 import argparse
-import pandas as pd
-from micom.workflows import build
 
+# Column types of the taxa table written by build_taxa_table. Reading them
+# explicitly skips type inference and keeps numeric-looking ids as strings.
+TAXA_TABLE_DTYPES = {
+    "sample_id": str,
+    "id": str,
+    "abundance": float,
+    "taxonomy": str,
+    "file": str,
+}
 
-def parse_arguments():
+
+def parse_arguments(argv: list = None):
     parser = argparse.ArgumentParser(
         description="Build MICOM models from taxonomy data."
     )
@@ -28,13 +36,16 @@ def parse_arguments():
     parser.add_argument(
         "--solver", type=str, default="gurobi", help="Solver to use for optimization."
     )
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
 def build_models(
     data_file: str, out_folder: str, cutoff: float, threads: int, solver: str
 ):
-    taxo_df = pd.read_csv(data_file, sep="\t", index_col=None)
+    import pandas as pd
+    from micom.workflows import build
+
+    taxo_df = pd.read_csv(data_file, sep="\t", index_col=None, dtype=TAXA_TABLE_DTYPES)
     manifest = build(
         taxonomy=taxo_df,
         model_db=None,
@@ -46,8 +57,8 @@ def build_models(
     return manifest
 
 
-def main():
-    args = parse_arguments()
+def main(argv: list = None):
+    args = parse_arguments(argv)
     manifest = build_models(
         args.taxa_table, args.outdir, args.abundance_cutoff, args.threads, args.solver
     )
@@ -1,10 +1,11 @@
 import argparse
 import csv
+import os
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Tuple
 
 
-def parse_arguments() -> argparse.Namespace:
+def parse_arguments(argv: list = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Build a TSV table from given arguments."
     )
@@ -24,23 +25,40 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument(
         "--base_path", help="Base directory path for external file system", default=""
     )
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
 def read_abundance_file(abundance_file: str) -> Dict[str, Tuple[str, str]]:
-    with open(abundance_file, "r") as file:
-        reader = csv.DictReader(file, delimiter="\t")
-        return {row["id"]: (row["abundance"], row["taxonomy"]) for row in reader}
+    with open(abundance_file, "r", newline="") as file:
+        reader = csv.reader(file, delimiter="\t")
+        header = next(reader)
+        id_col, abundance_col, taxonomy_col = (
+            header.index(col) for col in ("id", "abundance", "taxonomy")
+        )
+        n_cols = max(id_col, abundance_col, taxonomy_col) + 1
+        abundance_data = {}
+        n_short_rows = 0
+        for row in reader:
+            if not row:
+                continue  # Blank line, skipped as csv.DictReader does
+            if len(row) < n_cols:
+                n_short_rows += 1
+                continue
+            abundance_data[row[id_col]] = (row[abundance_col], row[taxonomy_col])
+    if n_short_rows:
+        print(f"Skipped {n_short_rows} rows with missing columns in {abundance_file}")
+    return abundance_data
 
 
 def get_ids_and_extensions_from_gem_directory(
     gem_directory: str,
 ) -> List[Tuple[str, str]]:
     id_extensions = []
-    directory = Path(gem_directory)
-    for file_path in directory.glob("*"):
-        if file_path.suffix in [".xml", ".json"]:
-            id_extensions.append((file_path.stem, file_path.suffix))
+    with os.scandir(gem_directory) as entries:
+        for entry in entries:
+            stem, suffix = os.path.splitext(entry.name)
+            if suffix in (".xml", ".json"):
+                id_extensions.append((stem, suffix))
     return id_extensions
 
 
@@ -50,28 +68,28 @@ def build_output_table(
     gem_directory: str,
     id_extensions: List[Tuple[str, str]],
     base_path: str = "",
-) -> List[List[str]]:
-    output_data = []
+) -> Iterator[List[str]]:
+    base = str(Path(base_path or gem_directory))
     for id, extension in id_extensions:
         abundance, taxonomy = abundance_data.get(id, ("0", "Unknown"))
-        original_file_path = Path(gem_directory) / f"{id}{extension}"
-        if base_path:
-            file_path = Path(base_path) / f"{id}{extension}"
-        else:
-            file_path = original_file_path
-        output_data.append([sample_id, id, abundance, taxonomy, str(file_path)])
-    return output_data
+        yield [
+            sample_id,
+            id,
+            abundance,
+            taxonomy,
+            os.path.join(base, f"{id}{extension}"),
+        ]
 
 
-def write_output_table(output_data: List[List[str]], output_file: str) -> None:
+def write_output_table(output_data: Iterable[List[str]], output_file: str) -> None:
     with open(output_file, "w", newline="") as file:
         writer = csv.writer(file, delimiter="\t")
         writer.writerow(["sample_id", "id", "abundance", "taxonomy", "file"])
         writer.writerows(output_data)
 
 
-def main() -> None:
-    args = parse_arguments()
+def main(argv: list = None) -> None:
+    args = parse_arguments(argv)
     abundance_data = read_abundance_file(args.abundances)
     id_extensions = get_ids_and_extensions_from_gem_directory(args.gems_dir)
     output_data = build_output_table(
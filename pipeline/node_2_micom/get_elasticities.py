@@ -1,9 +1,7 @@
 import argparse
-from micom.elasticity import elasticities
-from micom import load_pickle
 
 
-def parse_arguments():
+def parse_arguments(argv: list = None):
     parser = argparse.ArgumentParser(description="Calculate elasticities using MICOM.")
     parser.add_argument(
         "--cgem_pickle", type=str, help="Path to the CGEM model file (Pickle format)."
@@ -14,26 +12,42 @@ def parse_arguments():
         default=0.5,
         help="Growth tradeoff parameter for elasticity calculation.",
     )
+    parser.add_argument(
+        "--solver",
+        type=str,
+        default=None,
+        help=(
+            "Solver to use for the elasticity LPs (e.g. highs, glpk, gurobi, cplex). "
+            "Gurobi and CPLEX require a license. Defaults to the solver stored in the model."
+        ),
+    )
     parser.add_argument(
         "--out_elasticities",
         type=str,
         default="results/micom/elasticities.tsv",
         help="Path to the output TSV file.",
     )
-    return parser.parse_args()
+    return parser.parse_args(argv)
+
 
+def calculate_elasticities(
+    cgem_file: str, fraction: float, output_file: str, solver: str = None
+):
+    from micom import load_pickle
+    from micom.elasticity import elasticities
 
-def calculate_elasticities(cgem_file: str, fraction: float, output_file: str):
     cgem = load_pickle(cgem_file)
+    if solver is not None:
+        cgem.solver = solver
     eps = elasticities(cgem, fraction=fraction, reactions=cgem.exchanges)
     eps.to_csv(output_file, sep="\t", index=False)
     return eps
 
 
-def main():
-    args = parse_arguments()
+def main(argv: list = None):
+    args = parse_arguments(argv)
     eps = calculate_elasticities(
-        args.cgem_pickle, args.growth_tradeoff, args.out_elasticities
+        args.cgem_pickle, args.growth_tradeoff, args.out_elasticities, args.solver
     )
     print("Elasticity calculations completed.")
 
@@ -5,6 +5,7 @@ This script serves as an entry point to execute various scripts used in a Nextfl
 allowing the user to select a specific operation via subcommands.
 
 Available subcommands:
+- get_medium_from_media_db: Extracts exchange reactions for a given medium from a media database.
 - build_taxa_table: Builds a taxa table from abundances and genomes.
 - build_cgem: Builds a community GEM.
 - get_exchanges: Retrieves exchange reactions for a community GEM.
@@ -15,226 +16,210 @@ Usage:
 """
 import os
 import argparse
+import importlib
 import subprocess
+import sys
+from functools import partial
 
 PARENT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-
-def get_medium_from_media_db(args):
-    """Extracts exchange reactions for a given medium from a media database."""
-    command = [
-        "python",
-        f"{PARENT_DIR}/get_medium_from_media_db.py",
-        "--media-db",
-        str(args.media_db),
-        "--medium-id",
-        args.medium_id,
-        "--compartment",
-        args.compartment,
-        "--max-uptake",
-        str(args.max_uptake),
-    ]
-    if args.outfile:
-        command += ["--outfile", str(args.outfile)]
-    subprocess.run(command, check=True)
-
-
-def build_taxa_table(args):
-    """Builds a taxa table from abundances and genomes."""
-    command = [
-        "python",
-        f"{PARENT_DIR}/build_taxa_table.py",
-        "--sample_id",
-        args.sample_id,
-        "--abundances",
-        args.abundances,
-        "--gems_dir",
-        args.gems_dir,
-        "--out_taxatable",
-        args.out_taxatable,
-        "--base_path",
-        args.base_path,
-    ]
-    subprocess.run(command, check=True)
-
-
-def build_cgem(args):
-    """Builds a community GEM."""
-    command = [
-        "python",
-        f"{PARENT_DIR}/build_cgem.py",
-        "--taxa_table",
-        args.taxa_table,
-        "--outdir",
-        args.outdir,
-        "--abundance_cutoff",
-        str(args.abundance_cutoff),
-        "--threads",
-        str(args.threads),
-        "--solver",
-        args.solver,
-    ]
-    subprocess.run(command, check=True)
-
-
-def get_exchanges(args):
-    """Retrieves exchange reactions for a community GEM."""
-    command = [
-        "python",
-        f"{PARENT_DIR}/get_exchanges.py",
-        "--manifest",
-        args.manifest,
-        "--outdir",
-        args.outdir,
-        "--media_file",
-        args.media_file,
-        "--growth_tradeoff",
-        str(args.growth_tradeoff),
-        "--threads",
-        str(args.threads),
-        "--out_exchanges",
-        args.out_exchanges,
-    ]
-    subprocess.run(command, check=True)
-
-
-def get_elasticities(args):
-    """Calculates elasticities for a community GEM."""
-    command = [
-        "python",
-        f"{PARENT_DIR}/get_elasticities.py",
-        "--cgem_pickle",
-        args.cgem_pickle,
-        "--growth_tradeoff",
-        str(args.growth_tradeoff),
-        "--out_elasticities",
-        args.out_elasticities,
-    ]
-    subprocess.run(command, check=True)
+# Each subcommand runs the script of the same name. Arguments are forwarded to
+# the script with the same flag, except for those listed under "not_forwarded".
+SUBCOMMANDS = {
+    "get_medium_from_media_db": {
+        "help": "Extracts exchange reactions for a given medium from a media database.",
+        "args": [
+            (
+                "--media-db",
+                dict(type=str, required=True, help="Path to the media database."),
+            ),
+            (
+                "--medium-id",
+                dict(type=str, required=True, help="ID of the medium to use."),
+            ),
+            (
+                "--compartment",
+                dict(
+                    type=str,
+                    default="e",
+                    help="Compartment of exchanges. Defaults to 'e'.",
+                ),
+            ),
+            (
+                "--max-uptake",
+                dict(
+                    type=float,
+                    default=1000,
+                    help="Maximum uptake rate. Defaults to 1000.",
+                ),
+            ),
+            (
+                "--outfile",
+                dict(type=str, help="Path to write the extracted medium to. Optional."),
+            ),
+        ],
+    },
+    "build_taxa_table": {
+        "help": "Builds a taxa table from abundances and genomes.",
+        "args": [
+            ("--sample_id", dict(required=True, help="Sample ID.")),
+            (
+                "--gems_dir",
+                dict(required=True, help="Directory containing genome files."),
+            ),
+            ("--abundances", dict(required=True, help="Path to abundances file.")),
+            (
+                "--out_taxatable",
+                dict(default="taxa_table.tsv", help="Output taxa table file."),
+            ),
+            (
+                "--base_path",
+                dict(help="Base directory path for external file system", default=""),
+            ),
+        ],
+    },
+    "build_cgem": {
+        "help": "Builds a community GEM.",
+        "args": [
+            ("--taxa_table", dict(required=True, help="Path to the taxa table file.")),
+            (
+                "--gems_dir",
+                dict(required=True, help="Directory containing genome files."),
+            ),
+            (
+                "--outdir",
+                dict(default="./results", help="Directory to save the output files."),
+            ),
+            (
+                "--abundance_cutoff",
+                dict(
+                    type=float,
+                    default=0.01,
+                    help="Abundance cutoff for including taxa.",
+                ),
+            ),
+            ("--threads", dict(type=int, default=10, help="Number of threads to use.")),
+            (
+                "--solver",
+                dict(default="gurobi", help="Solver to use for optimization."),
+            ),
+        ],
+        "not_forwarded": {"--gems_dir"},
+    },
+    "get_exchanges": {
+        "help": "Retrieves exchange reactions for a community GEM.",
+        "args": [
+            ("--manifest", dict(required=True, help="Path to the manifest file.")),
+            (
+                "--outdir",
+                dict(required=True, help="Directory where the output will be saved."),
+            ),
+            ("--media_file", dict(required=True, help="Path to the media file.")),
+            (
+                "--growth_tradeoff",
+                dict(type=float, default=0.5, help="Growth tradeoff parameter."),
+            ),
+            ("--threads", dict(type=int, default=10, help="Number of threads to use.")),
+            (
+                "--out_exchanges",
+                dict(
+                    default="exchanges.tsv",
+                    help="Output file for exchange reactions.",
+                ),
+            ),
+        ],
+    },
+    "get_elasticities": {
+        "help": "Calculates elasticities for a community GEM.",
+        "args": [
+            (
+                "--cgem_pickle",
+                dict(required=True, help="Path to the community GEM pickle file."),
+            ),
+            (
+                "--growth_tradeoff",
+                dict(
+                    type=float,
+                    default=0.5,
+                    help="Growth tradeoff parameter for elasticity calculation.",
+                ),
+            ),
+            (
+                "--out_elasticities",
+                dict(default="elasticities.tsv", help="Output file for elasticities."),
+            ),
+            (
+                "--solver",
+                dict(
+                    help="Solver for the elasticity LPs. Defaults to the model's solver."
+                ),
+            ),
+        ],
+    },
+}
+
+
+def run_script(
+    script_name: str,
+    script_args: list,
+    isolated: bool = False,
+    scripts_dir: str = PARENT_DIR,
+) -> None:
+    """
+    Run one of the pipeline scripts with the given command line arguments.
+
+    By default the script's main() is called in this process, so heavy imports
+    (micom, cobra, optlang) are paid once. With isolated=True the script is run
+    in a separate Python interpreter instead. Scripts are looked up in
+    scripts_dir, which defaults to the directory of this file.
+    """
+    if isolated:
+        command = ["python", os.path.join(scripts_dir, f"{script_name}.py")]
+        subprocess.run(command + script_args, check=True)
+    else:
+        if scripts_dir not in sys.path:
+            sys.path.insert(0, scripts_dir)
+        importlib.import_module(script_name).main(script_args)
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Entry point script for micom pipeline operations."
-    )
-    subparsers = parser.add_subparsers(help="Available commands")
-    # Subcommand: get_medium_from_media_db
-    parser_medium = subparsers.add_parser(
-        "get_medium_from_media_db",
-        help="Extracts exchange reactions for a given medium from a media database.",
-    )
-    parser_medium.add_argument(
-        "--media-db", type=str, required=True, help="Path to the media database."
-    )
-    parser_medium.add_argument(
-        "--medium-id", type=str, required=True, help="ID of the medium to use."
-    )
-    parser_medium.add_argument(
-        "--compartment",
-        type=str,
-        default="e",
-        help="Compartment of exchanges. Defaults to 'e'.",
-    )
-    parser_medium.add_argument(
-        "--max-uptake",
-        type=float,
-        default=1000,
-        help="Maximum uptake rate. Defaults to 1000.",
-    )
-    parser_medium.add_argument(
-        "--outfile", type=str, help="Path to write the extracted medium to. Optional."
-    )
-    parser_medium.set_defaults(func=get_medium_from_media_db)
+def get_script_args(spec: dict, args: argparse.Namespace) -> list:
+    """Translate parsed subcommand arguments back into script arguments."""
+    not_forwarded = spec.get("not_forwarded", set())
+    script_args = []
+    for flag, _ in spec["args"]:
+        value = getattr(args, flag.lstrip("-").replace("-", "_"))
+        if flag in not_forwarded or value is None:
+            continue
+        script_args += [flag, str(value)]
+    return script_args
 
-    # Subcommand: build_taxa_table
-    parser_taxa = subparsers.add_parser(
-        "build_taxa_table", help="Builds a taxa table from abundances and genomes."
-    )
-    parser_taxa.add_argument("--sample_id", required=True, help="Sample ID.")
-    parser_taxa.add_argument(
-        "--gems_dir", required=True, help="Directory containing genome files."
-    )
-    parser_taxa.add_argument(
-        "--abundances", required=True, help="Path to abundances file."
-    )
-    parser_taxa.add_argument(
-        "--out_taxatable", default="taxa_table.tsv", help="Output taxa table file."
-    )
-    parser_taxa.add_argument(
-        "--base_path", help="Base directory path for external file system", default=""
-    )
-    parser_taxa.set_defaults(func=build_taxa_table)
 
-    # Subcommand: build_cgem
-    parser_cgem = subparsers.add_parser("build_cgem", help="Builds a community GEM.")
-    parser_cgem.add_argument(
-        "--taxa_table", required=True, help="Path to the taxa table file."
-    )
-    parser_cgem.add_argument(
-        "--gems_dir", required=True, help="Directory containing genome files."
-    )
-    parser_cgem.add_argument(
-        "--outdir", default="./results", help="Directory to save the output files."
-    )
-    parser_cgem.add_argument(
-        "--abundance_cutoff",
-        type=float,
-        default=0.01,
-        help="Abundance cutoff for including taxa.",
-    )
-    parser_cgem.add_argument(
-        "--threads", type=int, default=10, help="Number of threads to use."
-    )
-    parser_cgem.add_argument(
-        "--solver", default="gurobi", help="Solver to use for optimization."
-    )
-    parser_cgem.set_defaults(func=build_cgem)
+def run_subcommand(name: str, args: argparse.Namespace) -> None:
+    """Run the script behind a subcommand."""
+    script_args = get_script_args(SUBCOMMANDS[name], args)
+    run_script(name, script_args, args.isolated, args.scripts_dir)
 
-    # Subcommand: get_exchanges
-    parser_exchanges = subparsers.add_parser(
-        "get_exchanges", help="Retrieves exchange reactions for a community GEM."
-    )
-    parser_exchanges.add_argument(
-        "--manifest", required=True, help="Path to the manifest file."
-    )
-    parser_exchanges.add_argument(
-        "--outdir", required=True, help="Directory where the output will be saved."
-    )
-    parser_exchanges.add_argument(
-        "--media_file", required=True, help="Path to the media file."
-    )
-    parser_exchanges.add_argument(
-        "--growth_tradeoff", type=float, default=0.5, help="Growth tradeoff parameter."
-    )
-    parser_exchanges.add_argument(
-        "--threads", type=int, default=10, help="Number of threads to use."
-    )
-    parser_exchanges.add_argument(
-        "--out_exchanges",
-        default="exchanges.tsv",
-        help="Output file for exchange reactions.",
-    )
-    parser_exchanges.set_defaults(func=get_exchanges)
 
-    # Subcommand: get_elasticities
-    parser_elasticities = subparsers.add_parser(
-        "get_elasticities", help="Calculates elasticities for a community GEM."
-    )
-    parser_elasticities.add_argument(
-        "--cgem_pickle", required=True, help="Path to the community GEM pickle file."
+def main():
+    parser = argparse.ArgumentParser(
+        description="Entry point script for micom pipeline operations."
     )
-    parser_elasticities.add_argument(
-        "--growth_tradeoff",
-        type=float,
-        default=0.5,
-        help="Growth tradeoff parameter for elasticity calculation.",
+    parser.add_argument(
+        "--isolated",
+        action="store_true",
+        help="Run each operation in a separate Python process.",
     )
-    parser_elasticities.add_argument(
-        "--out_elasticities",
-        default="elasticities.tsv",
-        help="Output file for elasticities.",
+    parser.add_argument(
+        "--scripts-dir",
+        default=PARENT_DIR,
+        help="Directory containing the pipeline scripts. Defaults to this script's directory.",
     )
-    parser_elasticities.set_defaults(func=get_elasticities)
+    subparsers = parser.add_subparsers(help="Available commands")
+    for name, spec in SUBCOMMANDS.items():
+        subparser = subparsers.add_parser(name, help=spec["help"])
+        for flag, kwargs in spec["args"]:
+            subparser.add_argument(flag, **kwargs)
+        subparser.set_defaults(func=partial(run_subcommand, name))
 
     # Parse arguments and call the corresponding function
     args = parser.parse_args()
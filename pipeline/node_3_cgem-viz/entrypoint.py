@@ -1,13 +1,15 @@
+from __future__ import annotations
 import argparse
+import os
 from pathlib import Path
-import matplotlib.pyplot as plt
-from plot_interactions import (
-    generate_bipartite_graph,
-    plot_trophic_interactions,
-    plot_exchange_heatmap,
-    plot_metabolic_sankey,
-    DEFAULT_HIDDEN_METABOLITES,
-)
+
+
+def positive_int(value: str) -> int:
+    """Parse a command line argument that must be an integer >= 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
 
 
 def parse_args():
@@ -143,6 +145,12 @@ def parse_args():
     )
     parser.add_argument("--font-size", type=int, default=6, help="Font size for labels")
     parser.add_argument("--seed", type=int, default=2, help="Random seed for layout")
+    parser.add_argument(
+        "--label-node-cap",
+        type=int,
+        default=200,
+        help="Skip node labels in network plot when there are more nodes than this",
+    )
 
     # Additional visualization options
     parser.add_argument(
@@ -168,91 +176,135 @@ def parse_args():
         default=0.1,
         help="Minimum flux value to include in Sankey diagram",
     )
+    parser.add_argument(
+        "--sankey-max-links",
+        type=positive_int,
+        default=None,
+        help="Maximum number of links in Sankey diagram, keeping the largest fluxes",
+    )
+    parser.add_argument(
+        "--sankey-plotlyjs-cdn",
+        action="store_true",
+        help="Link plotly.js from a CDN in the Sankey HTML instead of embedding it "
+        "(smaller file, but needs internet access to view)",
+    )
 
     return parser.parse_args()
 
 
+def parse_flux_cutoff(flux_cutoff: str | None) -> float | str | None:
+    """Convert the --flux-cutoff argument to a number unless it is a 'top' option."""
+    if flux_cutoff is None or flux_cutoff in ("top20", "top10"):
+        return flux_cutoff
+    try:
+        return float(flux_cutoff)
+    except ValueError:
+        raise ValueError("flux_cutoff must be a number, 'top20', or 'top10'")
+
+
+def run_network(args, hidden_metabolites: frozenset, output_dir: Path) -> None:
+    import matplotlib.pyplot as plt
+    from plot_interactions import generate_bipartite_graph, plot_trophic_interactions
+
+    # Generate bipartite graph
+    graph_output = output_dir / args.graph_output
+    bipartite_graph = generate_bipartite_graph(
+        args.exchanges_file,
+        hide_taxa=frozenset(args.hide_taxa),
+        hide_metabolites=hidden_metabolites,
+        keep_metabolites=frozenset(args.keep_metabolites),
+        flux_cutoff=parse_flux_cutoff(args.flux_cutoff),
+        target_taxon=args.target_taxon,
+        environmental_carbon_sources=args.medium_sources,
+        output_graph=str(graph_output),
+    )
+
+    # Create visualization
+    fig, ax = plot_trophic_interactions(
+        bipartite_graph=bipartite_graph,
+        environmental_carbon_sources=args.medium_sources,
+        figsize=(12, 12),
+        highlight_compounds=args.highlight_compounds,
+        target_taxon=args.target_taxon,
+        target_compound=args.target_compound,
+        highlight_color=args.highlight_color,
+        edge_color=args.edge_color,
+        node_color=args.node_color,
+        large_node_size=args.large_node_size,
+        small_node_size=args.small_node_size,
+        edge_width_target_taxon=args.edge_width_target,
+        edge_width_other=args.edge_width_other,
+        arrow_size_target_taxon=args.arrow_size_target,
+        arrow_size_other=args.arrow_size_other,
+        font_size=args.font_size,
+        seed=args.seed,
+        label_node_cap=args.label_node_cap,
+    )
+    plt.savefig(output_dir / "trophic_interactions.png", dpi=300, bbox_inches="tight")
+    plt.close(fig)
+
+
+def run_heatmap(args, hidden_metabolites: frozenset, output_dir: Path) -> None:
+    import matplotlib.pyplot as plt
+    from plot_interactions import plot_exchange_heatmap
+
+    fig, ax = plot_exchange_heatmap(
+        args.exchanges_file,
+        normalize=args.normalize_heatmap,
+        cluster=args.cluster_heatmap,
+        output_path=str(output_dir / "exchange_heatmap.png"),
+        hide_metabolites=hidden_metabolites,
+        show_inorganic_compounds=args.show_inorganic_compounds,
+    )
+    plt.close(fig)
+
+
+def run_sankey(args, hidden_metabolites: frozenset, output_dir: Path) -> None:
+    from plot_interactions import plot_metabolic_sankey
+
+    plot_metabolic_sankey(
+        args.exchanges_file,
+        flux_cutoff=args.sankey_flux_cutoff,
+        max_links=args.sankey_max_links,
+        output_html=str(output_dir / "metabolic_sankey.html"),
+        output_png=str(output_dir / "metabolic_sankey.png"),
+        hide_metabolites=hidden_metabolites,
+        show_inorganic_compounds=args.show_inorganic_compounds,
+        include_plotlyjs="cdn" if args.sankey_plotlyjs_cdn else True,
+    )
+
+
+VISUALIZATIONS = {
+    "network": run_network,
+    "heatmap": run_heatmap,
+    "sankey": run_sankey,
+}
+
+
 def main():
     args = parse_args()
+    if args.visualization_type == "network":
+        # Fail on a malformed cutoff before loading any plotting module
+        parse_flux_cutoff(args.flux_cutoff)
+
+    # Plotting modules are imported after argument parsing, so --help and
+    # invalid arguments return without paying for them. Rendering is
+    # non-interactive, so skip matplotlib's GUI backend detection.
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    from plot_interactions import DEFAULT_HIDDEN_METABOLITES
 
     # Create output directory if it doesn't exist
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Handle hidden metabolites
-    hidden_metabolites = args.hide_metabolites.copy()
+    # Handle hidden metabolites (sets, as they are only used for lookups)
+    hidden_metabolites = frozenset(args.hide_metabolites)
     if not args.show_inorganic_compounds:
-        hidden_metabolites.extend(
-            [m for m in DEFAULT_HIDDEN_METABOLITES if m not in args.keep_metabolites]
-        )
-
-    if args.visualization_type == "network":
-        # Process flux_cutoff argument
-        flux_cutoff = args.flux_cutoff
-        if flux_cutoff is not None and flux_cutoff not in ["top20", "top10"]:
-            try:
-                flux_cutoff = float(flux_cutoff)
-            except ValueError:
-                raise ValueError("flux_cutoff must be a number, 'top20', or 'top10'")
-
-        # Generate bipartite graph
-        graph_output = output_dir / args.graph_output
-        bipartite_graph = generate_bipartite_graph(
-            args.exchanges_file,
-            hide_taxa=args.hide_taxa,
-            hide_metabolites=hidden_metabolites,
-            keep_metabolites=args.keep_metabolites,
-            flux_cutoff=flux_cutoff,
-            target_taxon=args.target_taxon,
-            environmental_carbon_sources=args.medium_sources,
-            output_graph=str(graph_output),
+        hidden_metabolites |= frozenset(DEFAULT_HIDDEN_METABOLITES) - frozenset(
+            args.keep_metabolites
         )
 
-        # Create visualization
-        fig, ax = plot_trophic_interactions(
-            bipartite_graph=bipartite_graph,
-            environmental_carbon_sources=args.medium_sources,
-            figsize=(12, 12),
-            highlight_compounds=args.highlight_compounds,
-            target_taxon=args.target_taxon,
-            target_compound=args.target_compound,
-            highlight_color=args.highlight_color,
-            edge_color=args.edge_color,
-            node_color=args.node_color,
-            large_node_size=args.large_node_size,
-            small_node_size=args.small_node_size,
-            edge_width_target_taxon=args.edge_width_target,
-            edge_width_other=args.edge_width_other,
-            arrow_size_target_taxon=args.arrow_size_target,
-            arrow_size_other=args.arrow_size_other,
-            font_size=args.font_size,
-            seed=args.seed,
-        )
-        plt.savefig(
-            output_dir / "trophic_interactions.png", dpi=300, bbox_inches="tight"
-        )
-        plt.close(fig)
-
-    elif args.visualization_type == "heatmap":
-        fig, ax = plot_exchange_heatmap(
-            args.exchanges_file,
-            normalize=args.normalize_heatmap,
-            cluster=args.cluster_heatmap,
-            output_path=str(output_dir / "exchange_heatmap.png"),
-            hide_metabolites=hidden_metabolites,
-            show_inorganic_compounds=args.show_inorganic_compounds,
-        )
-        plt.close(fig)
-
-    elif args.visualization_type == "sankey":
-        fig = plot_metabolic_sankey(
-            args.exchanges_file,
-            flux_cutoff=args.sankey_flux_cutoff,
-            output_html=str(output_dir / "metabolic_sankey.html"),
-            output_png=str(output_dir / "metabolic_sankey.png"),
-            hide_metabolites=hidden_metabolites,
-            show_inorganic_compounds=args.show_inorganic_compounds,
-        )
+    VISUALIZATIONS[args.visualization_type](args, hidden_metabolites, output_dir)
 
 
 if __name__ == "__main__":
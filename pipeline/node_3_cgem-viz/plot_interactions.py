@@ -1,14 +1,18 @@
 # plot_interactions.py
 from __future__ import annotations
 from pathlib import Path
+from itertools import chain
+from typing import TYPE_CHECKING
 import json
 import random
 import networkx as nx
+import numpy as np
 import matplotlib.pyplot as plt
-import plotly.graph_objects as go
-import seaborn as sns
 import pandas as pd
 
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
 
 DEFAULT_HIDDEN_METABOLITES = [
     "h",
@@ -37,6 +41,54 @@ DEFAULT_HIDDEN_METABOLITES = [
     "mn2",
 ]
 
+# Columns of the MICOM exchanges table used for plotting
+EXCHANGES_DTYPES = {"taxon": str, "flux": float, "metabolite": str, "direction": str}
+
+
+def read_exchanges(
+    exchanges_file_path: str, relabel_nodes: dict = None
+) -> pd.DataFrame:
+    """
+    Reads the exchanges of a MICOM growth simulation for plotting.
+
+    Args:
+        exchanges_file_path (str): The path to the file containing exchange data.
+        relabel_nodes (dict, optional): Dictionary to relabel metabolites. Defaults to None.
+
+    Returns:
+        pd.DataFrame: Table with taxon, metabolite, direction and absolute flux
+            columns, with "_sp" removed from taxa and "_e" from metabolites.
+    """
+    exchanges = pd.read_csv(
+        exchanges_file_path,
+        sep="\t",
+        usecols=list(EXCHANGES_DTYPES),
+        dtype=EXCHANGES_DTYPES,
+    )
+    exchanges["taxon"] = exchanges["taxon"].str.replace("_sp", "", regex=False)
+    exchanges["metabolite"] = exchanges["metabolite"].str.replace("_e", "", regex=False)
+    if relabel_nodes is not None:
+        exchanges["metabolite"] = [
+            relabel_nodes.get(metabolite, metabolite)
+            for metabolite in exchanges["metabolite"]
+        ]
+    exchanges["flux"] = exchanges["flux"].abs()
+    return exchanges[["taxon", "metabolite", "direction", "flux"]]
+
+
+def write_graph_json(data: dict, output_path: str) -> None:
+    """
+    Write graph data to a JSON file, with orjson if it is installed.
+    """
+    try:
+        import orjson
+    except ImportError:
+        with open(output_path, "w") as f:
+            json.dump(data, f)
+    else:
+        with open(output_path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY))
+
 
 def generate_bipartite_graph(
     exchanges_file_path: str,
@@ -70,36 +122,20 @@ def generate_bipartite_graph(
     Returns:
         nx.DiGraph: The generated bipartite graph.
     """
+    # Sets for membership tests; None still means "no filter"
+    if hide_taxa is not None:
+        hide_taxa = frozenset(hide_taxa)
+    if hide_metabolites is not None:
+        hide_metabolites = frozenset(hide_metabolites)
+    if keep_metabolites is not None:
+        keep_metabolites = frozenset(keep_metabolites)
+    carbon_sources = frozenset(environmental_carbon_sources or ())
+
     G = nx.DiGraph()
     if relabel_nodes is not None:
         G = nx.relabel_nodes(G, relabel_nodes)
 
-    # Store all fluxes and their corresponding information
-    all_interactions = []
-    with open(exchanges_file_path, "r") as f:
-        for line in f:
-            if "taxon" in line:
-                continue
-            cols = line.strip().split("\t")
-            taxon = cols[1].replace("_sp", "")
-            metabolite = cols[7].replace("_e", "")
-            if relabel_nodes is not None and metabolite in relabel_nodes:
-                metabolite = relabel_nodes[metabolite]
-            direction = cols[8]
-            flux = abs(float(cols[5]))
-
-            # Store interaction info
-            all_interactions.append(
-                {
-                    "taxon": taxon,
-                    "metabolite": metabolite,
-                    "direction": direction,
-                    "flux": flux,
-                }
-            )
-
-    # Sort interactions by flux magnitude
-    all_interactions.sort(key=lambda x: x["flux"], reverse=True)
+    all_interactions = read_exchanges(exchanges_file_path, relabel_nodes)
 
     # Handle flux cutoff
     if isinstance(flux_cutoff, str):
@@ -110,41 +146,55 @@ def generate_bipartite_graph(
         else:
             raise ValueError("flux_cutoff string must be either 'top20' or 'top10'")
 
-        # Keep top percentage of interactions by flux magnitude
+        # Keep top percentage of interactions by flux magnitude (and ties). The
+        # k-th largest flux is found by partial selection instead of sorting.
         cutoff_idx = max(1, int(len(all_interactions) * percentage))
-        min_flux = all_interactions[cutoff_idx - 1]["flux"]
-        all_interactions = [
-            inter for inter in all_interactions if inter["flux"] >= min_flux
-        ]
+        fluxes = all_interactions["flux"].to_numpy()
+        fluxes = fluxes[~np.isnan(fluxes)]
+        kth = len(fluxes) - min(cutoff_idx, len(fluxes))
+        min_flux = np.partition(fluxes, kth)[kth]
+        all_interactions = all_interactions[all_interactions["flux"] >= min_flux]
     elif flux_cutoff is not None:
         # Use numeric cutoff
-        all_interactions = [
-            inter for inter in all_interactions if inter["flux"] >= flux_cutoff
-        ]
+        all_interactions = all_interactions[all_interactions["flux"] >= flux_cutoff]
 
-    # Process filtered interactions
-    for interaction in all_interactions:
-        taxon = interaction["taxon"]
-        metabolite = interaction["metabolite"]
-        direction = interaction["direction"]
-
-        if hide_taxa is None or taxon not in hide_taxa:
-            G.add_node(taxon, bipartite=0)
-        if hide_metabolites is None or metabolite not in hide_metabolites:
-            if (
-                environmental_carbon_sources is None
-                or metabolite in environmental_carbon_sources
-            ):
-                G.add_node(metabolite, bipartite=1)
-            elif target_taxon is not None and (
-                taxon == target_taxon or metabolite == target_taxon
-            ):
-                G.add_node(metabolite, bipartite=1)
+    # Sort the remaining interactions by flux magnitude
+    all_interactions = all_interactions.sort_values(
+        "flux", ascending=False, kind="stable"
+    )
 
-        if direction == "export":
-            G.add_edge(taxon, metabolite)
-        elif direction == "import":
-            G.add_edge(metabolite, taxon)
+    # Process filtered interactions
+    taxa = all_interactions["taxon"].to_numpy()
+    metabolites = all_interactions["metabolite"].to_numpy()
+    is_export = (all_interactions["direction"] == "export").to_numpy()
+    is_import = (all_interactions["direction"] == "import").to_numpy()
+    shown_taxa = np.ones(len(taxa), dtype=bool)
+    if hide_taxa is not None:
+        shown_taxa = ~all_interactions["taxon"].isin(hide_taxa).to_numpy()
+    labeled_metabolites = np.ones(len(metabolites), dtype=bool)
+    if hide_metabolites is not None:
+        labeled_metabolites = (
+            ~all_interactions["metabolite"].isin(hide_metabolites).to_numpy()
+        )
+    if environmental_carbon_sources is not None:
+        in_sources = all_interactions["metabolite"].isin(carbon_sources)
+        if target_taxon is not None:
+            in_sources |= (all_interactions["taxon"] == target_taxon) | (
+                all_interactions["metabolite"] == target_taxon
+            )
+        labeled_metabolites &= in_sources.to_numpy()
+
+    # Add nodes in the order the interactions introduce them (taxon first),
+    # since node order seeds the layout. Hidden nodes are removed below.
+    node_order = np.column_stack([taxa, metabolites]).ravel()
+    added = np.column_stack(
+        [shown_taxa, labeled_metabolites | is_export | is_import]
+    ).ravel()
+    G.add_nodes_from(dict.fromkeys(node_order[added]))
+    G.add_nodes_from(taxa[shown_taxa], bipartite=0)
+    G.add_nodes_from(metabolites[labeled_metabolites], bipartite=1)
+    G.add_edges_from(zip(taxa[is_export], metabolites[is_export]))
+    G.add_edges_from(zip(metabolites[is_import], taxa[is_import]))
 
     if hide_taxa is not None:
         G.remove_nodes_from(hide_taxa)
@@ -159,7 +209,7 @@ def generate_bipartite_graph(
         for node in list(G.nodes):
             if (
                 "bipartite" in G.nodes[node]
-                and (node not in (environmental_carbon_sources or []))
+                and node not in carbon_sources
                 and G.nodes[node]["bipartite"] == 1
             ):
                 if not G.has_edge(node, target_taxon) and (
@@ -170,13 +220,39 @@ def generate_bipartite_graph(
     G.remove_nodes_from(list(nx.isolates(G)))
 
     if output_graph is not None:
-        data = nx.readwrite.json_graph.node_link_data(G)
-        with open(output_graph, "w") as f:
-            json.dump(data, f)
+        write_graph_json(nx.readwrite.json_graph.node_link_data(G), output_graph)
 
     return G
 
 
+def draw_subgraph(
+    graph: nx.DiGraph,
+    pos: dict,
+    node_size: list,
+    node_color: list,
+    edge_color: str,
+    arrowsize: int,
+    width: float,
+    ax: plt.Axes,
+) -> None:
+    """
+    Draws the nodes and edges of a graph without labels, as nx.draw does, but
+    without its figure and axes handling.
+    """
+    nx.draw_networkx_nodes(
+        graph, pos, node_size=node_size, node_color=node_color, ax=ax
+    )
+    nx.draw_networkx_edges(
+        graph,
+        pos,
+        node_size=node_size,
+        edge_color=edge_color,
+        arrowsize=arrowsize,
+        width=width,
+        ax=ax,
+    )
+
+
 def plot_trophic_interactions(
     bipartite_graph: nx.DiGraph,
     environmental_carbon_sources: list[str] = None,
@@ -196,6 +272,7 @@ def plot_trophic_interactions(
     arrow_size_other: int = 5,
     font_size: int = 8,
     seed: int = None,
+    label_node_cap: int = 200,
 ) -> tuple[plt.Figure, plt.Axes]:
     """
     Plot trophic interactions from a bipartite graph.
@@ -219,11 +296,14 @@ def plot_trophic_interactions(
         arrow_size_other (int, optional): Arrow size for other taxa. Defaults to 5.
         font_size (int, optional): Font size for labels. Defaults to 8.
         seed (int, optional): Random seed for layout. Defaults to None.
+        label_node_cap (int, optional): Maximum number of nodes to label. Labels
+            of the highlighted and non-highlighted nodes are skipped when there are
+            more of them than this, as they would be unreadable. None labels all
+            nodes. Defaults to 200.
     """
-    if highlight_compounds is None:
-        highlight_compounds = []
-    if environmental_carbon_sources is None:
-        environmental_carbon_sources = []
+    # Sets, as these are only used for membership tests
+    highlight_compounds = frozenset(highlight_compounds or ())
+    environmental_carbon_sources = frozenset(environmental_carbon_sources or ())
 
     if seed is None:
         seed = random.randint(0, 100)
@@ -231,19 +311,21 @@ def plot_trophic_interactions(
     # Create figure and axes if not provided
     if ax is None:
         fig, ax = plt.subplots(figsize=figsize)
-        fig.set_facecolor("black")
     else:
         fig = ax.figure
+    # Black axes on a white figure background
+    fig.set_facecolor("w")
+
+    # Side of each node (0: taxon, 1: metabolite), looked up once
+    bip = dict(bipartite_graph.nodes(data="bipartite", default=1))
 
     # Get nodes connected to highlighted compounds
-    taxon_nodes_connected_to_highlight = []
-    if highlight_compounds:
-        taxon_nodes_connected_to_highlight = [
-            n
-            for compound in highlight_compounds
-            for n in bipartite_graph.neighbors(compound)
-            if bipartite_graph.nodes[n]["bipartite"] == 0
-        ]
+    taxon_nodes_connected_to_highlight = {
+        n
+        for compound in highlight_compounds
+        for n in bipartite_graph.neighbors(compound)
+        if bip[n] == 0
+    }
 
     # Get direct and indirect nodes
     direct_nodes = []
@@ -270,14 +352,19 @@ def plot_trophic_interactions(
     if target_taxon is not None:
         target_taxon_compounds = [
             n
-            for n in bipartite_graph.to_undirected().neighbors(target_taxon)
-            if bipartite_graph.nodes[n]["bipartite"] == 1
+            for n in dict.fromkeys(
+                chain(
+                    bipartite_graph.successors(target_taxon),
+                    bipartite_graph.predecessors(target_taxon),
+                )
+            )
+            if bip[n] == 1
         ]
         species_connected_to_target_taxon_compounds = [
             n
             for compound in target_taxon_compounds
             for n in bipartite_graph.neighbors(compound)
-            if bipartite_graph.nodes[n]["bipartite"] == 0
+            if bip[n] == 0
         ]
 
     # Create subgraph
@@ -287,8 +374,7 @@ def plot_trophic_interactions(
         + indirect_nodes_extended
         + target_taxon_compounds
         + species_connected_to_target_taxon_compounds
-        + highlight_compounds
-    )
+    ).union(highlight_compounds)
 
     # If no specific nodes are selected, use all nodes
     if not subgraph_nodes:
@@ -296,96 +382,85 @@ def plot_trophic_interactions(
 
     subgraph = bipartite_graph.subgraph(subgraph_nodes)
 
-    # Add medium donor edges if medium sources are provided
-    extended_subgraph = nx.DiGraph(subgraph)
+    # Add medium donor edges if medium sources are provided. Only then is the
+    # subgraph view copied into a graph that can take the new edges.
+    extended_subgraph = subgraph
     if environmental_carbon_sources:
         medium_donor_edges = [
             (u, v)
             for u, v in bipartite_graph.edges()
-            if u in environmental_carbon_sources
-            and bipartite_graph.nodes[v]["bipartite"] == 0
+            if u in environmental_carbon_sources and bip[v] == 0
         ]
-        extended_subgraph.add_edges_from(medium_donor_edges)
+        if medium_donor_edges:
+            extended_subgraph = nx.DiGraph(subgraph)
+            extended_subgraph.add_edges_from(medium_donor_edges)
 
-    # Set bipartite attribute for new nodes
-    for node in extended_subgraph.nodes():
-        if "bipartite" not in extended_subgraph.nodes[node]:
-            extended_subgraph.nodes[node]["bipartite"] = 1
+    # Nodes added with the medium donor edges carry no attributes and are
+    # drawn as metabolites
+    extended_bip = dict(extended_subgraph.nodes(data="bipartite", default=1))
 
     # Create layout
     shell_layout = nx.shell_layout(
         extended_subgraph,
         [
-            {n for n, d in extended_subgraph.nodes(data=True) if d["bipartite"] == 0},
-            {n for n, d in extended_subgraph.nodes(data=True) if d["bipartite"] == 1},
+            {n for n, b in extended_bip.items() if b == 0},
+            {n for n, b in extended_bip.items() if b == 1},
         ],
         rotate=seed,
     )
 
-    # Split graph into highlighted and non-highlighted parts
-    non_highlight_edges = [
-        (u, v)
-        for u, v in extended_subgraph.edges()
-        if u not in highlight_compounds and v not in highlight_compounds
-    ]
-    highlight_edges = [
-        (u, v)
-        for u, v in extended_subgraph.edges()
-        if u in highlight_compounds or v in highlight_compounds
-    ]
+    # Split graph into highlighted and non-highlighted parts, in one pass
+    non_highlight_edges = []
+    highlight_edges = []
+    for edge in extended_subgraph.edges():
+        if edge[0] in highlight_compounds or edge[1] in highlight_compounds:
+            highlight_edges.append(edge)
+        else:
+            non_highlight_edges.append(edge)
 
     non_highlight_subgraph = extended_subgraph.edge_subgraph(non_highlight_edges)
     highlight_subgraph = extended_subgraph.edge_subgraph(highlight_edges)
 
+    # Node colors and sizes, computed once for both draw calls
+    color_by_node = {
+        n: (
+            highlight_color
+            if (
+                n in highlight_compounds
+                or (target_taxon and n == target_taxon)
+                or n in taxon_nodes_connected_to_highlight
+            )
+            else node_color
+        )
+        for n in extended_subgraph.nodes
+    }
+    size_by_node = {
+        n: large_node_size if b == 0 else small_node_size
+        for n, b in extended_bip.items()
+    }
+
     # Draw non-highlighted part
-    nx.draw(
+    draw_subgraph(
         non_highlight_subgraph,
         shell_layout,
-        with_labels=False,
-        node_size=[
-            large_node_size if d["bipartite"] == 0 else small_node_size
-            for _, d in non_highlight_subgraph.nodes(data=True)
-        ],
-        node_color=[
-            (
-                highlight_color
-                if (
-                    node in highlight_compounds
-                    or (target_taxon and node == target_taxon)
-                    or node in taxon_nodes_connected_to_highlight
-                )
-                else node_color
-            )
-            for node in non_highlight_subgraph.nodes()
-        ],
+        node_size=[size_by_node[n] for n in non_highlight_subgraph.nodes()],
+        node_color=[color_by_node[n] for n in non_highlight_subgraph.nodes()],
         edge_color=edge_color,
         arrowsize=arrow_size_other,
         width=edge_width_other,
         ax=ax,
     )
 
-    # Draw highlighted part
+    # Draw highlighted part, with metabolite nodes twice as large
     if highlight_edges:
-        nx.draw(
+        draw_subgraph(
             highlight_subgraph,
             shell_layout,
-            with_labels=False,
             node_size=[
-                large_node_size if d["bipartite"] == 0 else 2 * small_node_size
-                for _, d in highlight_subgraph.nodes(data=True)
-            ],
-            node_color=[
-                (
-                    highlight_color
-                    if (
-                        node in highlight_compounds
-                        or (target_taxon and node == target_taxon)
-                        or node in taxon_nodes_connected_to_highlight
-                    )
-                    else node_color
-                )
-                for node in highlight_subgraph.nodes()
+                large_node_size if extended_bip[n] == 0 else 2 * small_node_size
+                for n in highlight_subgraph.nodes()
             ],
+            node_color=[color_by_node[n] for n in highlight_subgraph.nodes()],
             edge_color=highlight_color,
             arrowsize=arrow_size_target_taxon,
             width=edge_width_target_taxon,
@@ -398,15 +473,18 @@ def plot_trophic_interactions(
         node for node in extended_subgraph.nodes if node not in highlight_nodes
     ]
 
-    nx.draw_networkx_labels(
-        extended_subgraph,
-        shell_layout,
-        labels={n: n for n in non_highlight_nodes},
-        font_size=font_size,
-        ax=ax,
-    )
+    if label_node_cap is None or len(non_highlight_nodes) <= label_node_cap:
+        nx.draw_networkx_labels(
+            extended_subgraph,
+            shell_layout,
+            labels={n: n for n in non_highlight_nodes},
+            font_size=font_size,
+            ax=ax,
+        )
 
-    if highlight_nodes:
+    if highlight_nodes and (
+        label_node_cap is None or len(highlight_nodes) <= label_node_cap
+    ):
         nx.draw_networkx_labels(
             extended_subgraph,
             shell_layout,
@@ -443,8 +521,15 @@ def plot_exchange_heatmap(
     Returns:
         Figure and Axes objects
     """
+    import seaborn as sns
+
     # Read data
-    exchanges = pd.read_csv(exchanges_file_path, sep="\t")
+    exchanges = pd.read_csv(
+        exchanges_file_path,
+        sep="\t",
+        usecols=list(EXCHANGES_DTYPES),
+        dtype=EXCHANGES_DTYPES,
+    )
 
     # Handle metabolite filtering
     metabolites_to_hide = []
@@ -456,12 +541,14 @@ def plot_exchange_heatmap(
     # Filter out hidden metabolites
     if metabolites_to_hide:
         exchanges = exchanges[
-            ~exchanges["metabolite"].str.replace("_e", "").isin(metabolites_to_hide)
+            ~exchanges["metabolite"]
+            .str.replace("_e", "", regex=False)
+            .isin(metabolites_to_hide)
         ]
 
     # Pivot data for heatmap
-    matrix = exchanges.pivot_table(
-        values="flux", index="taxon", columns="metabolite", aggfunc="sum", fill_value=0
+    matrix = (
+        exchanges.groupby(["taxon", "metabolite"])["flux"].sum().unstack(fill_value=0)
     )
 
     if normalize:
@@ -498,6 +585,8 @@ def plot_metabolic_sankey(
     output_png: str = None,
     hide_metabolites: list[str] = None,
     show_inorganic_compounds: bool = False,
+    max_links: int = None,
+    include_plotlyjs: bool | str = True,
 ) -> go.Figure:
     """
     Creates a Sankey diagram showing metabolic fluxes between taxa and compounds.
@@ -509,12 +598,28 @@ def plot_metabolic_sankey(
         output_png: Path to save static PNG plot
         hide_metabolites: List of metabolites to hide from visualization
         show_inorganic_compounds: Whether to show inorganic compounds
+        max_links: Maximum number of links to draw, keeping those with the
+            largest fluxes. Must be at least 1. All links above flux_cutoff are
+            drawn if None
+        include_plotlyjs: How plotly.js is included in the HTML plot. By
+            default the bundle is embedded so the file works offline; "cdn"
+            links it instead for a much smaller file
 
     Returns:
         Plotly figure object
     """
+    if max_links is not None and max_links < 1:
+        raise ValueError("max_links must be a positive integer or None")
+
+    import plotly.graph_objects as go
+
     # Read exchanges data
-    exchanges = pd.read_csv(exchanges_file_path, sep="\t")
+    exchanges = pd.read_csv(
+        exchanges_file_path,
+        sep="\t",
+        usecols=list(EXCHANGES_DTYPES),
+        dtype=EXCHANGES_DTYPES,
+    )
 
     # Handle metabolite filtering
     metabolites_to_hide = []
@@ -526,7 +631,9 @@ def plot_metabolic_sankey(
     # Filter out hidden metabolites
     if metabolites_to_hide:
         exchanges = exchanges[
-            ~exchanges["metabolite"].str.replace("_e", "").isin(metabolites_to_hide)
+            ~exchanges["metabolite"]
+            .str.replace("_e", "", regex=False)
+            .isin(metabolites_to_hide)
         ]
 
     # Process nodes and links
@@ -540,23 +647,18 @@ def plot_metabolic_sankey(
     )  # Blue for taxa, green for metabolites
 
     # Create links
-    links = []
-    for _, row in exchanges.iterrows():
-        if abs(row["flux"]) >= flux_cutoff:
-            if row["direction"] == "export":
-                source = list(taxa).index(row["taxon"])
-                target = len(taxa) + list(metabolites).index(row["metabolite"])
-            else:
-                source = len(taxa) + list(metabolites).index(row["metabolite"])
-                target = list(taxa).index(row["taxon"])
-            links.append(
-                {
-                    "source": source,
-                    "target": target,
-                    "value": abs(row["flux"]),
-                    "color": "rgba(127, 127, 127, 0.4)",  # Translucent grey for links
-                }
-            )
+    taxon_index = {taxon: i for i, taxon in enumerate(taxa)}
+    metabolite_index = {
+        metabolite: len(taxa) + i for i, metabolite in enumerate(metabolites)
+    }
+    links = exchanges[exchanges["flux"].abs() >= flux_cutoff]
+    if max_links is not None and len(links) > max_links:
+        # Keep the largest fluxes, in table order
+        top = np.argpartition(-links["flux"].abs().to_numpy(), max_links - 1)
+        links = links.iloc[np.sort(top[:max_links])]
+    taxon_nodes = links["taxon"].map(taxon_index).to_numpy()
+    metabolite_nodes = links["metabolite"].map(metabolite_index).to_numpy()
+    is_export = (links["direction"] == "export").to_numpy()
 
     # Common Sankey settings to ensure consistent appearance
     sankey_data = go.Sankey(
@@ -568,10 +670,11 @@ def plot_metabolic_sankey(
             color=node_colors,
         ),
         link=dict(
-            source=[link["source"] for link in links],
-            target=[link["target"] for link in links],
-            value=[link["value"] for link in links],
-            color=[link["color"] for link in links],
+            source=np.where(is_export, taxon_nodes, metabolite_nodes).tolist(),
+            target=np.where(is_export, metabolite_nodes, taxon_nodes).tolist(),
+            value=links["flux"].abs().tolist(),
+            # Translucent grey for links
+            color=["rgba(127, 127, 127, 0.4)"] * len(links),
         ),
     )
 
@@ -591,7 +694,7 @@ def plot_metabolic_sankey(
 
     # Save interactive HTML
     if output_html:
-        fig.write_html(output_html)
+        fig.write_html(output_html, include_plotlyjs=include_plotlyjs)
 
     # Create and save static PNG figure with white background
     if output_png:
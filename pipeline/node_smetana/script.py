@@ -1,10 +1,42 @@
 #!/usr/bin/env python
 import argparse
+import fnmatch
 import glob
 import os
 import subprocess
 
 
+def find_model_files(models_pattern: str) -> list:
+    """
+    Finds the files matching a glob pattern.
+
+    When only the file name part of the pattern has wildcards, the directory is
+    listed once with os.scandir and names are matched with fnmatch, which is
+    faster than glob.glob for directories with many models. Hidden files are
+    skipped unless the pattern asks for them, as glob does.
+
+    Args:
+        models_pattern: Glob pattern for the model files.
+
+    Returns:
+        List of matching file paths.
+    """
+    dirname, basename = os.path.split(models_pattern)
+    if glob.has_magic(dirname):
+        return glob.glob(models_pattern)
+    include_hidden = basename.startswith(".")
+    try:
+        with os.scandir(dirname or os.curdir) as entries:
+            return [
+                os.path.join(dirname, entry.name)
+                for entry in entries
+                if fnmatch.fnmatchcase(entry.name, basename)
+                and (include_hidden or not entry.name.startswith("."))
+            ]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+
 def run_smetana(
     models_pattern: str,
     media: str,
@@ -20,15 +52,12 @@ def run_smetana(
         models_pattern: Pattern for model XML files to include in the analysis.
         media: Definition of the media to use.
         mediadb: Path to the media database file.
-        outdir: Directory where the output will be saved.
+        outdir: Directory where the output will be saved. Must exist.
         solver: Solver to use for the analysis.
         detailed: Flag to produce detailed output.
     """
-    # Ensure output directory exists
-    os.makedirs(outdir, exist_ok=True)
-
     # Find model files matching the pattern
-    model_files = glob.glob(models_pattern)
+    model_files = find_model_files(models_pattern)
 
     # Construct the smetana command
     smetana_command = (
@@ -84,6 +113,10 @@ def main() -> None:
     Main function to parse arguments and execute the smetana command.
     """
     args = parse_arguments()
+
+    # Ensure output directory exists
+    os.makedirs(args.outdir, exist_ok=True)
+
     run_smetana(
         args.models_pattern,
         args.media,
@@ -1,6 +1,14 @@
 import argparse
-import pandas as pd
-from micom.workflows import build
+
+# Column types of the taxa table written by build_taxa_table. Reading them
+# explicitly skips type inference and keeps numeric-looking ids as strings.
+TAXA_TABLE_DTYPES = {
+    "sample_id": str,
+    "id": str,
+    "abundance": float,
+    "taxonomy": str,
+    "file": str,
+}
 
 
 def parse_arguments():
@@ -31,7 +39,10 @@ def parse_arguments():
 def build_models(
     data_file: str, out_folder: str, cutoff: float, threads: int, solver: str
 ):
-    taxo_df = pd.read_csv(data_file, sep="\t", index_col=None)
+    import pandas as pd
+    from micom.workflows import build
+
+    taxo_df = pd.read_csv(data_file, sep="\t", index_col=None, dtype=TAXA_TABLE_DTYPES)
     manifest = build(
         taxonomy=taxo_df,
         model_db=None,
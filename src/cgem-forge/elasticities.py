@@ -1,4 +1,8 @@
 from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+
 import numpy as np
 import pandas as pd
 from cobra.core import Model, Reaction
@@ -8,6 +12,9 @@ from rich.progress import track
 
 STEP = 0.1
 
+# Community model of a worker process, set once by _init_fva_worker
+_worker_com = None
+
 
 def split_fva_results(fva_results: pd.DataFrame) -> pd.Series:
     """
@@ -19,44 +26,83 @@ def split_fva_results(fva_results: pd.DataFrame) -> pd.Series:
     Returns:
     pd.Series: Series with reaction IDs (appended with "_forward" or "_reverse") as index and fluxes as values.
     """
-    flux_dict = {
-        f"{reaction_id}_forward": max_flux
-        for reaction_id, max_flux in fva_results["maximum"].items()
-    }
-    flux_dict.update(
-        {
-            f"{reaction_id}_reverse": -min_flux
-            for reaction_id, min_flux in fva_results["minimum"].items()
-        }
+    reaction_ids = fva_results.index.astype(str)
+    forward = pd.Series(
+        fva_results["maximum"].to_numpy(), index=reaction_ids + "_forward"
+    )
+    reverse = pd.Series(
+        -fva_results["minimum"].to_numpy(), index=reaction_ids + "_reverse"
     )
-    return pd.Series(flux_dict)
+    return pd.concat([forward, reverse])
 
 
-def _elasticities_fva(before_fluxes: pd.Series, after_fluxes: pd.Series) -> pd.Series:
+def _elasticities_fva(
+    before_fluxes: pd.Series,
+    after_fluxes: pd.Series,
+    log_before: np.ndarray = None,
+) -> pd.Series:
     """
     Calculate the derivatives using preprocessed FVA results for each reaction direction.
 
     Parameters:
     before_fluxes (pd.Series): Series of fluxes before perturbation.
     after_fluxes (pd.Series): Series of fluxes after perturbation.
+    log_before (np.ndarray): log1p of before_fluxes, when computed in advance.
 
     Returns:
     pd.Series: Series of calculated derivatives for each reaction.
     """
     eps = np.finfo(float).eps
-    elasts = {
-        reaction_id: (np.log1p(after_flux) - np.log1p(before_flux)) / STEP
-        for reaction_id, before_flux, after_flux in zip(
-            before_fluxes.index, before_fluxes, after_fluxes
+    before = before_fluxes.to_numpy(dtype=float)
+    after = after_fluxes.reindex(before_fluxes.index).to_numpy(dtype=float)
+    mask = (before > eps) | (after > eps)
+    if log_before is None:
+        log_before_masked = np.log1p(before[mask])
+    else:
+        log_before_masked = log_before[mask]
+    elasts = (np.log1p(after[mask]) - log_before_masked) / STEP
+    return pd.Series(elasts, index=before_fluxes.index[mask])
+
+
+def _init_fva_worker(com: Model) -> None:
+    """Store the community model in a worker process."""
+    global _worker_com
+    _worker_com = com
+
+
+def _fva_for_taxon(
+    taxon: str, reactions: list, fraction: float, com: Model = None
+) -> pd.Series:
+    """
+    Run FVA with the abundance of one taxon perturbed by STEP (in log space).
+
+    Parameters:
+    taxon (str): The taxon whose abundance is perturbed.
+    reactions (list): Reactions (or reaction IDs) to consider for FVA.
+    fraction (float): Fraction of optimum for FVA calculation.
+    com (Model): The community model. Defaults to the worker's model.
+
+    Returns:
+    pd.Series: Forward and reverse fluxes after the perturbation.
+    """
+    if com is None:
+        com = _worker_com
+    original_abundance = com.abundances.copy()
+    abundance = original_abundance.copy()
+    abundance.loc[taxon] *= np.exp(STEP)
+    com.set_abundance(abundance, normalize=False)
+    try:
+        fva_after = flux_variability_analysis(
+            com, reaction_list=reactions, fraction_of_optimum=fraction, processes=1
         )
-        if (before_flux > eps or after_flux > eps)
-    }
-    return pd.Series(elasts)
+    finally:
+        com.set_abundance(original_abundance, normalize=False)
+    return split_fva_results(fva_after)
 
 
 def elasticities_by_abundance_fva(
     com: Model,
-    reactions: list[Reaction],
+    reactions: list[Reaction] | None,
     fraction: float,
     progress: bool,
     processes: int = 2,
@@ -66,9 +112,11 @@ def elasticities_by_abundance_fva(
 
     Parameters:
     com (Model): The community model.
-    reactions (List[Reaction]): List of reactions to consider for FVA.
+    reactions (List[Reaction]): List of reactions to consider for FVA, or None
+        for all reactions.
     fraction (float): Fraction of optimum for FVA calculation.
     progress (bool): Whether to display progress.
+    processes (int): Number of processes for FVA. Taxa are run in parallel.
 
     Returns:
     pd.DataFrame: DataFrame containing elasticity results for reactions.
@@ -77,41 +125,60 @@ def elasticities_by_abundance_fva(
         com, reaction_list=reactions, fraction_of_optimum=fraction, processes=processes
     )
     fluxes_before = split_fva_results(fva_before)
+    # The same for every taxon, so only computed once
+    with np.errstate(invalid="ignore", divide="ignore"):
+        log_before = np.log1p(fluxes_before.to_numpy(dtype=float))
 
     dfs = []
-    abundance = com.abundances.copy()
-    taxa = abundance.index
-
-    if progress:
-        taxa = track(taxa, description="Taxa")
-
-    for taxon in taxa:
-        original_abundance = abundance[taxon]
-        abundance.loc[taxon] *= np.exp(STEP)
-        com.set_abundance(abundance, normalize=False)
-        fva_after = flux_variability_analysis(
-            com, reaction_list=reactions, fraction_of_optimum=fraction, processes=1
+    taxa = com.abundances.index
+
+    # Taxa are independent, so their FVAs run in separate processes, each
+    # holding its own copy of the model. A single process skips the pickling.
+    parallel = processes > 1 and len(taxa) > 1
+    pool = (
+        ProcessPoolExecutor(
+            max_workers=min(processes, len(taxa)),
+            initializer=_init_fva_worker,
+            initargs=(com,),
         )
-        fluxes_after = split_fva_results(fva_after)
-        abundance.loc[taxon] = original_abundance
-        com.set_abundance(abundance, normalize=False)
-
-        elasts = _elasticities_fva(fluxes_before, fluxes_after)
-
-        evaluated_reactions = [reaction_id for reaction_id in elasts.index]
-        direction = [
-            "forward" if "_forward" in reaction_id else "reverse"
-            for reaction_id in elasts.index
-        ]
-        res = pd.DataFrame(
-            {
-                "reaction": evaluated_reactions,
-                "taxon": taxon,
-                "effector": taxon,
-                "direction": direction,
-                "elasticity": elasts.values,
-            }
-        )
-        dfs.append(res)
+        if parallel
+        else nullcontext()
+    )
+    with pool:
+        if parallel:
+            reaction_ids = (
+                None if reactions is None else [getattr(r, "id", r) for r in reactions]
+            )
+            all_fluxes_after = pool.map(
+                partial(_fva_for_taxon, reactions=reaction_ids, fraction=fraction),
+                taxa,
+            )
+        else:
+            all_fluxes_after = (
+                _fva_for_taxon(taxon, reactions, fraction, com) for taxon in taxa
+            )
+
+        results = zip(taxa, all_fluxes_after)
+        if progress:
+            results = track(results, total=len(taxa), description="Taxa")
+
+        for taxon, fluxes_after in results:
+            elasts = _elasticities_fva(fluxes_before, fluxes_after, log_before)
+
+            evaluated_reactions = [reaction_id for reaction_id in elasts.index]
+            direction = [
+                "forward" if "_forward" in reaction_id else "reverse"
+                for reaction_id in elasts.index
+            ]
+            res = pd.DataFrame(
+                {
+                    "reaction": evaluated_reactions,
+                    "taxon": taxon,
+                    "effector": taxon,
+                    "direction": direction,
+                    "elasticity": elasts.values,
+                }
+            )
+            dfs.append(res)
 
     return pd.concat(dfs)
@@ -1,6 +1,4 @@
 import argparse
-from micom.elasticity import elasticities
-from micom import load_pickle
 
 
 def parse_arguments():
@@ -14,6 +12,15 @@ def parse_arguments():
         default=0.5,
         help="Fraction for elasticity calculation.",
     )
+    parser.add_argument(
+        "--solver",
+        type=str,
+        default=None,
+        help=(
+            "Solver to use for the elasticity LPs (e.g. highs, glpk, gurobi, cplex). "
+            "Gurobi and CPLEX require a license. Defaults to the solver stored in the model."
+        ),
+    )
     parser.add_argument(
         "--output",
         type=str,
@@ -23,8 +30,15 @@ def parse_arguments():
     return parser.parse_args()
 
 
-def calculate_elasticities(cgem_file: str, fraction: float, output_file: str):
+def calculate_elasticities(
+    cgem_file: str, fraction: float, output_file: str, solver: str = None
+):
+    from micom import load_pickle
+    from micom.elasticity import elasticities
+
     cgem = load_pickle(cgem_file)
+    if solver is not None:
+        cgem.solver = solver
     eps = elasticities(cgem, fraction=fraction, reactions=cgem.exchanges)
     eps.to_csv(output_file, sep="\t", index=False)
     return eps
@@ -32,7 +46,9 @@ def calculate_elasticities(cgem_file: str, fraction: float, output_file: str):
 
 def main():
     args = parse_arguments()
-    eps = calculate_elasticities(args.cgem_file, args.fraction, args.output)
+    eps = calculate_elasticities(
+        args.cgem_file, args.fraction, args.output, args.solver
+    )
     print("Elasticity calculations completed.")
 
 
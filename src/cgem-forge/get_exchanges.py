@@ -1,7 +1,4 @@
 import argparse
-import pandas as pd
-from micom.workflows import grow
-from micom import load_pickle
 
 
 def parse_arguments():
@@ -32,15 +29,33 @@ def parse_arguments():
 
 
 def load_cgem_model(model_folder: str, model_file: str):
+    from micom import load_pickle
+
     cgem_path = f"{model_folder}/{model_file}"
     cgem = load_pickle(cgem_path)
     return cgem
 
 
+def read_medium(medium_file: str):
+    import pandas as pd
+
+    return pd.read_csv(
+        medium_file,
+        sep="\t",
+        header=None,
+        usecols=[0, 1],
+        names=["reaction", "flux"],
+        dtype={"reaction": str, "flux": float},
+    )
+
+
+def get_exchange_ids(cgem) -> set:
+    return {r.id for r in cgem.exchanges}
+
+
 def prepare_medium(medium_file: str, cgem):
-    medium = pd.read_csv(medium_file, sep="\t", header=None)
-    medium.columns = ["reaction", "flux"]
-    medium = medium[medium.reaction.isin([r.id for r in cgem.exchanges])]
+    medium = read_medium(medium_file)
+    medium = medium[medium.reaction.isin(get_exchange_ids(cgem))]
     return medium
 
 
@@ -52,18 +67,25 @@ def run_growth_simulations(
     threads: int,
     output_file: str,
 ):
+    import pandas as pd
+    from micom.workflows import grow
+
     manifest = pd.read_csv(manifest_file, sep=",")
-    for _, row in manifest.iterrows():
-        cgem = load_cgem_model(model_folder, row["file"])
-        medium = prepare_medium(medium_file, cgem)
-        res = grow(
-            manifest,
-            model_folder=model_folder,
-            medium=medium,
-            tradeoff=tradeoff,
-            threads=threads,
-        )
-        res.exchanges[res.exchanges.taxon != "medium"].to_csv(output_file, sep="\t")
+    # grow() simulates every sample in the manifest, so it is called once with
+    # a medium covering the exchanges of all community models
+    exchange_ids = set()
+    for model_file in manifest["file"].unique():
+        exchange_ids |= get_exchange_ids(load_cgem_model(model_folder, model_file))
+    medium = read_medium(medium_file)
+    medium = medium[medium.reaction.isin(exchange_ids)]
+    res = grow(
+        manifest,
+        model_folder=model_folder,
+        medium=medium,
+        tradeoff=tradeoff,
+        threads=threads,
+    )
+    res.exchanges[res.exchanges.taxon != "medium"].to_csv(output_file, sep="\t")
     return res
 
 
@@ -1,14 +1,97 @@
 import argparse
+import glob
+import os
 from pathlib import Path
 import pandas as pd
 
 
+def _read_media_db_pyarrow(media_db) -> pd.DataFrame:
+    """
+    Read the medium and compound columns of a media database with pyarrow's
+    multithreaded CSV reader. Raises ImportError if pyarrow is not installed.
+    """
+    import pyarrow as pa
+    from pyarrow import csv
+
+    table = csv.read_csv(
+        media_db,
+        parse_options=csv.ParseOptions(delimiter="\t"),
+        convert_options=csv.ConvertOptions(
+            include_columns=["medium", "compound"],
+            column_types={"medium": pa.string(), "compound": pa.string()},
+            strings_can_be_null=True,
+        ),
+    )
+    return table.to_pandas().astype({"medium": "category"})
+
+
+def remove_stale_caches(media_db, cache_file: str) -> None:
+    """
+    Remove Parquet caches of older versions of a media database, i.e. those
+    keyed on a modification time and size other than the ones of cache_file.
+    """
+    prefix = f"{media_db}."
+    for stale_file in glob.glob(f"{glob.escape(prefix)}*.parquet"):
+        key = stale_file[len(prefix) : -len(".parquet")]
+        # Caches written before the size was part of the key have no "-size"
+        mtime, sep, size = key.partition("-")
+        is_cache = mtime.isdigit() and (size.isdigit() or not sep)
+        if stale_file != cache_file and is_cache:
+            try:
+                os.remove(stale_file)
+            except OSError:
+                pass
+
+
+def read_media_db(media_db: Path) -> pd.DataFrame:
+    """
+    Read the medium and compound columns of a media database.
+
+    The parsed table is cached as a Parquet file next to the database, keyed on
+    its modification time (in nanoseconds) and size, so that later calls skip
+    parsing the TSV. Caches of older versions of the database are removed when a
+    new one is written. If pyarrow is not installed or the cache cannot be
+    written, the TSV is read every time. On a cache miss the TSV is parsed with
+    pyarrow when available, else pandas.
+
+    Args:
+        media_db (Path): path to the media database
+
+    Returns:
+        media (pd.DataFrame): media database with medium and compound columns
+    """
+    stat = os.stat(media_db)
+    cache_file = f"{media_db}.{stat.st_mtime_ns}-{stat.st_size}.parquet"
+    if os.path.isfile(cache_file):
+        return pd.read_parquet(cache_file)
+    try:
+        media = _read_media_db_pyarrow(media_db)
+    except ImportError:
+        media = pd.read_csv(
+            media_db,
+            sep="\t",
+            usecols=["medium", "compound"],
+            dtype={"medium": "category", "compound": str},
+        )
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        media.to_parquet(tmp_file, index=False)
+        os.replace(tmp_file, cache_file)
+    except (ImportError, OSError):
+        if os.path.isfile(tmp_file):
+            os.remove(tmp_file)
+    else:
+        remove_stale_caches(media_db, cache_file)
+    return media
+
+
 def get_medium_from_media_db(
     media_db: Path,
     medium_id: str,
     compartment: str = "e",
     max_uptake: float = 1000,
     outfile: Path = None,
+    return_dict: bool = True,
 ) -> dict:
     """
     Get a dictionary of exchange reactions for a given medium.
@@ -19,22 +102,23 @@ def get_medium_from_media_db(
         compartment (str, optional): compartment of exchanges. Defaults to "e".
         max_uptake (float, optional): maximum uptake rate. Defaults to 1000.
         outfile (Path, optional): path to write the extracted medium to. Defaults to None.
+        return_dict (bool, optional): whether to build and return the medium dictionary.
+            Set to False when only outfile is needed. Defaults to True.
 
     Returns:
-        medium (dict): dictionary containing exchange reactions and their maximum uptake rates
+        medium (dict): dictionary containing exchange reactions and their maximum uptake rates,
+            or None if return_dict is False
     """
-    media = pd.read_csv(media_db, sep="\t")
-    if medium_id not in media.medium.values:
+    media = read_media_db(media_db)
+    if medium_id not in media["medium"].cat.categories:
         raise ValueError(f"Medium {medium_id} not found in media database.")
-    medium = {
-        f"EX_{species}_{compartment}": max_uptake
-        for species in media[media["medium"] == medium_id].compound
-    }
+    compounds = media.loc[media["medium"] == medium_id, "compound"]
+    exchanges = ("EX_" + compounds + f"_{compartment}").drop_duplicates()
     if outfile is not None:
         with open(outfile, "w") as f:
-            for k, v in medium.items():
-                f.write(f"{k}\t{v}\n")
-    return medium
+            f.write("".join(f"{k}\t{max_uptake}\n" for k in exchanges))
+    if return_dict:
+        return dict.fromkeys(exchanges, max_uptake)
 
 
 def parse_arguments():
@@ -65,6 +149,7 @@ def main(args):
         compartment=args.compartment,
         max_uptake=args.max_uptake,
         outfile=args.outfile,
+        return_dict=False,
     )
 
 
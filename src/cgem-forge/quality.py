@@ -1,14 +1,35 @@
 from __future__ import annotations
+from functools import lru_cache
 from pathlib import Path
 import json
 
 
+@lru_cache(maxsize=8)
+def _read_report(report: str, mtime: float) -> bytes:
+    """Read a memote JSON report, cached on path and modification time."""
+    return Path(report).read_bytes()
+
+
+def _load_report(report: Path) -> dict:
+    """Parse a memote JSON report, with orjson if it is installed.
+
+    Only the raw bytes are cached, so creating several Memote objects from the
+    same (unchanged) report reads it once, while each gets its own dictionary.
+    """
+    data = _read_report(str(report), report.stat().st_mtime)
+    try:
+        import orjson
+    except ImportError:
+        return json.loads(data)
+    return orjson.loads(data)
+
+
 class Memote:
     """Class to run memote tests on a model."""
 
     def __init__(self, report: Path):
-        with open(report, "r") as f:
-            self._report = json.load(f)
+        report = Path(report)
+        self._report = _load_report(report)
 
     @property
     def report(self) -> dict:
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import cobra
 from cobra import Reaction, Model
@@ -13,6 +14,8 @@ class GEM:
 
     def __init__(self, model: Path):
         self._model = cobra.io.read_sbml_model(model)
+        # Exchange formulas and their element counts, from the last lookup
+        self._exchange_elements = None
 
     def _repr_html_(self):
         return self._model._repr_html_()
@@ -36,12 +39,15 @@ class GEM:
             model (Model): _description_
             allowed_compartments (set, optional): _description_. Defaults to {"c", "e", "p"}.
         """
+        # rxn.compartments is recomputed from the metabolites on every access
         shuttle_rxns_in_unwanted_compartments = [
             rxn
-            for rxn in self._model.reactions
+            for rxn, compartments in (
+                (rxn, rxn.compartments) for rxn in self._model.reactions
+            )
             if (
-                (len(rxn.compartments) > 1)
-                and (not rxn.compartments.issubset(allowed_compartments))
+                (len(compartments) > 1)
+                and (not compartments.issubset(allowed_compartments))
             )
         ]
         self._model.remove_reactions(
@@ -57,24 +63,28 @@ class GEM:
             reaction (Reaction): _description_
             allowed_compartments (set, optional): _description_. Defaults to {"c", "e", "p"}.
         """
+        # Collect all changes first and apply them in a few batched calls, as
+        # each cobra add/remove call re-indexes the model
         reactions_to_add = []
         reactions_to_remove = []
+        metabolites_to_add = []
+        metabolites_to_remove = []
+        # Metabolites by ID, including the new ones, for fast lookups
+        met_index = {met.id: met for met in self._model.metabolites}
         for reaction in self._model.reactions:
             if not reaction.compartments.issubset(allowed_compartments):
 
                 new_metabolites = {}
                 for metabolite, stoich in reaction.metabolites.items():
                     new_met_id = metabolite.id[:-1] + "c"
-                    new_metabolite = (
-                        self._model.metabolites.get_by_id(new_met_id)
-                        if new_met_id in self._model.metabolites
-                        else metabolite.copy()
-                    )
+                    new_metabolite = met_index.get(new_met_id)
+                    if new_metabolite is None:
+                        new_metabolite = metabolite.copy()
+                        met_index[new_met_id] = new_metabolite
+                        metabolites_to_add.append(new_metabolite)
+                        metabolites_to_remove.append(metabolite)
                     new_metabolite.compartment = "c"
                     new_metabolite.id = new_met_id
-                    if new_met_id not in self._model.metabolites:
-                        self._model.add_metabolites([new_metabolite])
-                        self._model.remove_metabolites([metabolite])
                     new_metabolites[new_metabolite] = stoich
 
                 new_reaction = Reaction(
@@ -90,6 +100,14 @@ class GEM:
                 reactions_to_remove.append(reaction)
 
         self._model.remove_reactions(reactions_to_remove, remove_orphans=True)
+        self._model.remove_metabolites(
+            [
+                met
+                for met in metabolites_to_remove
+                if met.id in self._model.metabolites
+            ]
+        )
+        self._model.add_metabolites(metabolites_to_add)
         self._model.add_reactions(reactions_to_add)
 
     def annotate_compounds(self, cpd_annotations: Path) -> None:
@@ -101,11 +119,14 @@ class GEM:
             cpd_annotations (Path): _description_
         """
         cpd_db = pd.read_csv(cpd_annotations, sep="\t", index_col=0)
+        # Plain dicts, as .loc lookups are slow when done per metabolite
+        formulas = cpd_db["formula"].to_dict()
+        charges = cpd_db["charge"].to_dict()
         for met in self._model.metabolites:
             met_id = helpers.remove_compartment(met.id)
-            if met_id in cpd_db.index:
-                met.formula = cpd_db.loc[met_id, "formula"]
-                met.charge = cpd_db.loc[met_id, "charge"]
+            if met_id in formulas:
+                met.formula = formulas[met_id]
+                met.charge = charges[met_id]
 
     def prepare_for_carveme(self, output_reaction_file: Path) -> None:
         """
@@ -168,24 +189,40 @@ class GEM:
         reactions_to_remove = [rxn_pair[0] for rxn_pair in duplicated_reactions]
         self._model.remove_reactions(reactions_to_remove, remove_orphans=True)
 
-    def get_organic_exchanges(self) -> list[str]:
+    def _get_exchange_elements(self) -> pd.DataFrame:
         """
-        Get IDs of all organic exchanges in a self._model.
+        Get element counts of the metabolites in exchanges with a formula.
+        Formulas are only parsed again when the exchanges or their formulas
+        changed since the last call (including changes made through self.model).
         Returns:
-            list. List of exchange IDs.
+            pd.DataFrame. Element counts indexed by exchange ID.
         """
-        organic_exchanges = []
+        formulas = {}
         for rxn in self._model.exchanges:
             met = [met for met in rxn.metabolites][0]
             if met.formula is not None:
-                chemical_elements = helpers.extract_chemical_elements(met.formula)
-                if (
-                    (not helpers.is_co2(chemical_elements))
-                    and (not helpers.is_hco3(chemical_elements))
-                    and ("C" in chemical_elements)
-                ):
-                    organic_exchanges.append(rxn.id)
-        return organic_exchanges
+                formulas[rxn.id] = met.formula
+        key = tuple(formulas.items())
+        if self._exchange_elements is None or self._exchange_elements[0] != key:
+            elements = helpers.extract_chemical_elements_batch(
+                pd.Series(formulas, dtype=object)
+            )
+            self._exchange_elements = (key, elements)
+        return self._exchange_elements[1]
+
+    def get_organic_exchanges(self) -> list[str]:
+        """
+        Get IDs of all organic exchanges in a self._model.
+        Returns:
+            list. List of exchange IDs.
+        """
+        elements = self._get_exchange_elements()
+        is_organic = (
+            (~helpers.is_co2_mask(elements))
+            & (~helpers.is_hco3_mask(elements))
+            & (elements.get("C", 0) > 0)
+        )
+        return elements.index[is_organic].tolist()
 
     def get_inorganic_exchanges(self) -> list[str]:
         """
@@ -193,18 +230,13 @@ class GEM:
         Returns:
             list. List of exchange IDs.
         """
-        inorganic_exchanges = []
-        for rxn in self._model.exchanges:
-            met = [met for met in rxn.metabolites][0]
-            if met.formula is not None:
-                chemical_elements = helpers.extract_chemical_elements(met.formula)
-                if (
-                    (helpers.is_co2(chemical_elements))
-                    or (helpers.is_hco3(chemical_elements))
-                    or ("C" not in chemical_elements)
-                ):
-                    inorganic_exchanges.append(rxn.id)
-        return inorganic_exchanges
+        elements = self._get_exchange_elements()
+        is_inorganic = (
+            (helpers.is_co2_mask(elements))
+            | (helpers.is_hco3_mask(elements))
+            | (elements.get("C", 0) == 0)
+        )
+        return elements.index[is_inorganic].tolist()
 
     def open_inorganic_exchanges(
         self,
@@ -222,19 +254,17 @@ class GEM:
             include: list, optional, List of exchange IDs to be opened besides
             inorganic ones. Default is None.
         """
+        include = set(include or ())
+        # Exchanges with a formula, and those without carbon among them
+        elements = self._get_exchange_elements()
+        carbon = elements.reindex(columns=["C"], fill_value=0)["C"]
+        with_formula = set(elements.index)
+        without_carbon = set(elements.index[carbon == 0])
         for rxn in self._model.exchanges:
-            if include is not None and rxn.id in include:
-                rxn.lower_bound = lower_bound
-                rxn.upper_bound = upper_bound
-            else:
-                met = [met for met in rxn.metabolites][0]
-                if met.formula is not None:
-                    chemical_elements = helpers.extract_chemical_elements(met.formula)
-                    if "C" not in chemical_elements:
-                        rxn.lower_bound = lower_bound
-                        rxn.upper_bound = upper_bound
-                    else:
-                        rxn.lower_bound = 0
+            if rxn.id in include or rxn.id in without_carbon:
+                rxn.bounds = (lower_bound, upper_bound)
+            elif rxn.id in with_formula:
+                rxn.lower_bound = 0
 
     def add_external_metabolite(self, met_id: str) -> None:
         """
@@ -338,13 +368,17 @@ class GEM:
             model (Model): _description_
             max_flux (float, optional): _description_. Defaults to 1000.0.
         """
-        max_abs_flux = max(
-            [abs(rxn.upper_bound) for rxn in self._model.reactions]
-            + [abs(rxn.lower_bound) for rxn in self._model.reactions]
-        )
-        for rxn in self._model.reactions:
-            rxn.upper_bound = maximum_flux * (rxn.upper_bound / max_abs_flux)
-            rxn.lower_bound = maximum_flux * (rxn.lower_bound / max_abs_flux)
+        reactions = self._model.reactions
+        bounds = np.fromiter(
+            (bound for rxn in reactions for bound in rxn.bounds),
+            dtype=float,
+            count=2 * len(reactions),
+        ).reshape(-1, 2)
+        max_abs_flux = np.abs(bounds).max()
+        new_bounds = (maximum_flux * (bounds / max_abs_flux)).tolist()
+        # Set both bounds at once, so the solver is updated once per reaction
+        for rxn, (lower_bound, upper_bound) in zip(reactions, new_bounds):
+            rxn.bounds = (lower_bound, upper_bound)
 
     def remove_blocked_reactions(self) -> None:
         """
@@ -353,7 +387,6 @@ class GEM:
         Args:
             model (Model): _description_
         """
-        self._model.optimize()
         blocked_rxns = cobra.flux_analysis.variability.find_blocked_reactions(
             self._model
         )
@@ -366,7 +399,6 @@ class GEM:
         Args:
             model (Model): _description_
         """
-        self._model.optimize()
         flux_ranges = cobra.flux_analysis.variability.flux_variability_analysis(
             self._model
         )
@@ -387,7 +419,6 @@ class GEM:
         """
         if n_processes is None:
             n_processes = 2
-        self._model.optimize()
         flux_samples = cobra.sampling.sample(
             self._model, n_samples, method="achr", processes=n_processes
         )
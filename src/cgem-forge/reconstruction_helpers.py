@@ -4,22 +4,52 @@ from pathlib import Path
 
 import pandas as pd
 
+COMPARTMENT_PATTERN = re.compile(r"_[a-z]$")
+FORMULA_PATTERN = re.compile(r"([A-Z][a-z]*)(\d*)")
+
 
 def remove_compartment(met_id: str) -> str:
-    return re.sub(r"_[a-z]$", "", met_id)
+    # Fast path for the usual BiGG id ending in "_<compartment letter>"
+    if met_id[-2:-1] == "_" and "a" <= met_id[-1:] <= "z":
+        return met_id[:-2]
+    return COMPARTMENT_PATTERN.sub("", met_id)
 
 
 def extract_chemical_elements(formula: str) -> dict:
     """
     Extract the chemical components from a chemical formula.
     """
-    components = re.findall(r"([A-Z][a-z]*)(\d*)", formula)
+    components = FORMULA_PATTERN.findall(formula)
     component_dict = {}
     for element, count in components:
         component_dict[element] = int(count) if count else 1
     return component_dict
 
 
+def extract_chemical_elements_batch(formulas: pd.Series) -> pd.DataFrame:
+    """
+    Extract the chemical components from a series of chemical formulas.
+
+    Args:
+        formulas (pd.Series): chemical formulas, with a unique index
+
+    Returns:
+        pd.DataFrame: element counts, one row per formula (in the same order)
+            and one column per element. Missing elements are set to 0.
+    """
+    components = formulas.str.extractall(FORMULA_PATTERN)
+    if components.empty:
+        return pd.DataFrame(index=formulas.index)
+    components.columns = ["element", "count"]
+    components["count"] = (
+        pd.to_numeric(components["count"], errors="coerce").fillna(1).astype(int)
+    )
+    components = components.droplevel("match").set_index("element", append=True)
+    # Repeated elements keep the last count, as in extract_chemical_elements
+    counts = components["count"].groupby(level=[0, 1], sort=False).last()
+    return counts.unstack(fill_value=0).reindex(formulas.index, fill_value=0)
+
+
 def is_co2(chemical_elements: dict) -> bool:
     """Check whether molecule is CO2.
 
@@ -44,6 +74,39 @@ def is_hco3(chemical_elements: dict) -> bool:
     return chemical_elements == {"C": 1, "H": 1, "O": 3}
 
 
+def is_co2_mask(elements: pd.DataFrame) -> pd.Series:
+    """Check which rows of an element count table are CO2.
+
+    Args:
+        elements (pd.DataFrame): output of extract_chemical_elements_batch
+
+    Returns:
+        pd.Series: True for CO2, False otherwise
+    """
+    return (
+        (elements.get("C", 0) == 1)
+        & (elements.get("O", 0) == 2)
+        & ((elements > 0).sum(axis=1) == 2)
+    )
+
+
+def is_hco3_mask(elements: pd.DataFrame) -> pd.Series:
+    """Check which rows of an element count table are HCO3-.
+
+    Args:
+        elements (pd.DataFrame): output of extract_chemical_elements_batch
+
+    Returns:
+        pd.Series: True for HCO3-, False otherwise
+    """
+    return (
+        (elements.get("C", 0) == 1)
+        & (elements.get("H", 0) == 1)
+        & (elements.get("O", 0) == 3)
+        & ((elements > 0).sum(axis=1) == 3)
+    )
+
+
 def get_medium_dict_from_media_db(media_db: Path, medium_id: str) -> dict:
     """
     Get a dictionary of exchange reactions for a given medium.
@@ -56,13 +119,33 @@ def get_medium_dict_from_media_db(media_db: Path, medium_id: str) -> dict:
     Returns:
         Model: _description_
     """
-    media = pd.read_csv(media_db, sep="\t")
-    if medium_id not in media.medium.values:
+    media = pd.read_csv(
+        media_db,
+        sep="\t",
+        usecols=["medium", "compound"],
+        dtype={"medium": "category", "compound": str},
+    )
+    if medium_id not in media["medium"].cat.categories:
         raise ValueError(f"Medium {medium_id} not found in media database.")
-    return {
-        f"EX_{species}_e": 1000
-        for species in media[media["medium"] == medium_id].compound
-    }
+    compounds = media.loc[media["medium"] == medium_id, "compound"].to_numpy()
+    return dict.fromkeys((f"EX_{species}_e" for species in compounds), 1000)
+
+
+def iter_bigg_metabolites(BIGG_metabolites_json: Path):
+    """
+    Iterate over the entries of the BIGG metabolites JSON file.
+
+    Entries are streamed with ijson when it is installed, so the parsed JSON tree
+    is never held in memory. Otherwise the whole file is loaded with json.
+    """
+    try:
+        import ijson
+    except ImportError:
+        with open(BIGG_metabolites_json, "r") as f:
+            yield from json.load(f)["results"]
+    else:
+        with open(BIGG_metabolites_json, "rb") as f:
+            yield from ijson.items(f, "results.item")
 
 
 def get_dict_of_metabolite_ids(BIGG_metabolites_json: Path) -> dict:
@@ -74,10 +157,8 @@ def get_dict_of_metabolite_ids(BIGG_metabolites_json: Path) -> dict:
     Returns:
         dict: _description_
     """
-    with open(BIGG_metabolites_json, "r") as f:
-        met_data = json.load(f)
     met_names = {}
-    for entry in met_data["results"]:
+    for entry in iter_bigg_metabolites(BIGG_metabolites_json):
         met_names[entry["bigg_id"]] = entry["name"]
     return met_names
 
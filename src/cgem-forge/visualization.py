@@ -1,13 +1,58 @@
 import json
+from itertools import chain
 from pathlib import Path
 import matplotlib.pyplot as plt
+import numpy as np
 import seaborn as sns
-from pandas import DataFrame, Series
+from matplotlib.colors import to_rgba
+from pandas import DataFrame, Index, Series
 
 import networkx as nx
 from networkx.readwrite import json_graph
 
 
+def plot_density(
+    values: Series,
+    color: str,
+    label: str,
+    ax: plt.Axes,
+    cut: float = 3,
+    gridsize: int = 200,
+) -> None:
+    """Plot a filled Gaussian kernel density estimate (Scott's bandwidth).
+
+    Draws the same curve as sns.kdeplot(fill=True), with scipy's gaussian_kde
+    evaluated on a grid extending cut bandwidths beyond the data. Samples
+    with less than two distinct values are skipped.
+
+    Args:
+        values (Series): Values to estimate the density of.
+        color (str): Color of the curve and fill.
+        label (str): Legend label.
+        ax (plt.Axes): Axes to plot on.
+        cut (float, optional): Grid extension, in bandwidths. Defaults to 3.
+        gridsize (int, optional): Number of grid points. Defaults to 200.
+    """
+    from scipy.stats import gaussian_kde
+
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if values.size < 2 or values.min() == values.max():
+        return
+    kde = gaussian_kde(values, bw_method="scott")
+    bandwidth = np.sqrt(kde.covariance[0, 0])
+    xs = np.linspace(
+        values.min() - cut * bandwidth, values.max() + cut * bandwidth, gridsize
+    )
+    ax.fill_between(
+        xs,
+        kde(xs),
+        facecolor=to_rgba(color, 0.25),
+        edgecolor=color,
+        label=label,
+    )
+
+
 def plot_flux_distribution(
     sample: DataFrame,
     reaction_ids: list,
@@ -53,12 +98,8 @@ def plot_flux_distribution(
                 label="Histogram",
                 ax=ax,
             )
-        sns.kdeplot(
-            sample[reaction_id],
-            color="blue",
-            label="Density Estimation",
-            fill=True,
-            ax=ax,
+        plot_density(
+            sample[reaction_id], color="blue", label="Density Estimation", ax=ax
         )
 
         if fva is not None:
@@ -96,32 +137,25 @@ def rename_rxn_ids_for_escher(fluxes: Series, reaction_mapping: dict):
     base_ids = fluxes.index.str.extract(r"(.+?)_(?:c|h|m|x)")[0].dropna().astype(str)
     unique_reactions = base_ids[~base_ids.duplicated(keep=False)].unique()
     duplicated_reactions = base_ids[base_ids.duplicated(keep=False)].unique()
-    c_reactions = [r for r in duplicated_reactions if r + "_c" in fluxes.index]
-    m_reactions = [
+    c_reactions = {r for r in duplicated_reactions if r + "_c" in fluxes.index}
+    m_reactions = {
         r
         for r in duplicated_reactions
         if r + "_m" in fluxes.index and r not in c_reactions
-    ]
+    }
+    other_reactions = set(duplicated_reactions) - c_reactions - m_reactions
 
     # If in ore than one compartment, keep "c", then "m", then any other.
-    def custom_replace(s):
-        base, comp = s.rsplit("_", 1)
-        if base in unique_reactions:
-            return base
-        elif base in c_reactions and comp == "c":
-            return base
-        elif base in m_reactions and comp == "m":
-            return base
-        elif (
-            base in duplicated_reactions
-            and base not in c_reactions
-            and base not in m_reactions
-        ):
-            return base
-        else:
-            return s
-
-    fluxes.index = fluxes.index.map(custom_replace)
+    ids = fluxes.index.to_series()
+    split_ids = ids.str.rsplit("_", n=1, expand=True).reindex(columns=[0, 1])
+    base, comp = split_ids[0], split_ids[1]
+    keep_base = comp.notna() & (
+        base.isin(unique_reactions)
+        | (base.isin(c_reactions) & comp.eq("c"))
+        | (base.isin(m_reactions) & comp.eq("m"))
+        | base.isin(other_reactions)
+    )
+    fluxes.index = Index(base.where(keep_base, ids).to_numpy(), name=fluxes.index.name)
     fluxes = fluxes.groupby(fluxes.index).first().rename(index=reaction_mapping)
     return fluxes
 
@@ -138,20 +172,28 @@ def get_graph_object_from_smetana_table(
     Returns:
         nx.DiGraph: _description_
     """
+    donors = smetana_table["donor"].tolist()
+    receivers = smetana_table["receiver"].tolist()
+    compounds = smetana_table["compound"].tolist()
+    if weight is not None:
+        weights = smetana_table[weight].tolist()
+    else:
+        weights = [""] * len(compounds)
+
     B = nx.DiGraph()
-    for i, row in smetana_table.iterrows():
-        if weight is not None:
-            edge_weight = row[weight]
-        else:
-            edge_weight = ""
-        donor_id = row["donor"]
-        receiver_id = row["receiver"]
-        compound_id = row["compound"]
-        B.add_edge(donor_id, compound_id, weight=edge_weight)
-        B.add_edge(compound_id, receiver_id, weight=edge_weight)
-        B.add_node(donor_id, bipartite=0, group="genome")
-        B.add_node(receiver_id, bipartite=0, group="genome")
-        B.add_node(compound_id, bipartite=1, group="compound")
+    # Nodes in the order the rows would add them, then their attributes
+    B.add_nodes_from(
+        dict.fromkeys(chain.from_iterable(zip(donors, compounds, receivers)))
+    )
+    B.add_nodes_from(donors + receivers, bipartite=0, group="genome")
+    B.add_nodes_from(compounds, bipartite=1, group="compound")
+    # Donor -> compound and compound -> receiver edges, interleaved as in the table
+    B.add_edges_from(
+        chain.from_iterable(
+            ((d, c, {"weight": w}), (c, r, {"weight": w}))
+            for d, c, r, w in zip(donors, compounds, receivers, weights)
+        )
+    )
     if output_graph is not None:
         graph_data = json_graph.cytoscape_data(B)
         json.dump(graph_data, open(output_graph, "w"))